@@ -292,3 +292,390 @@ FOR EACH ROW
 EXECUTE FUNCTION set_updated_at();
 
 SELECT * FROM users;
+
+
+-- =========================
+-- Listado de citas: keyset (created_at, id) + filtros
+-- =========================
+CREATE INDEX IF NOT EXISTS idx_appointments_created_id
+  ON appointments(created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_user_created_id
+  ON appointments(user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_status_created_id
+  ON appointments(status, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_unpaid_created_id
+  ON appointments(created_at, id)
+  WHERE is_paid = FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_appointments_requested_start
+  ON appointments(requested_start);
+
+
+-- =========================
+-- Citas: description / comment / considerations como columnas reales
+-- (antes empaquetadas en `comment`: JSON de pack_fields o, en filas
+-- viejas, "descripcion\ncomentario\nconsideraciones")
+-- =========================
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS description TEXT;
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS considerations TEXT;
+
+CREATE OR REPLACE FUNCTION pg_temp.try_jsonb(t TEXT)
+RETURNS JSONB AS $$
+BEGIN
+  RETURN t::jsonb;
+EXCEPTION WHEN others THEN
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- description IS NULL marca las filas todavía no migradas (idempotente)
+UPDATE appointments a
+SET description    = COALESCE(j.doc->>'description', ''),
+    considerations = j.doc->>'considerations',
+    comment        = j.doc->>'comment'
+FROM (
+  SELECT id, pg_temp.try_jsonb(comment) AS doc
+  FROM appointments
+  WHERE description IS NULL
+) j
+WHERE a.id = j.id
+  AND jsonb_typeof(j.doc) = 'object'
+  AND j.doc ? 'description';
+
+UPDATE appointments
+SET description    = COALESCE(split_part(comment, E'\n', 1), ''),
+    considerations = NULLIF(split_part(comment, E'\n', 3), ''),
+    comment        = NULLIF(split_part(comment, E'\n', 2), '')
+WHERE description IS NULL;
+
+ALTER TABLE appointments ALTER COLUMN description SET DEFAULT '';
+ALTER TABLE appointments ALTER COLUMN description SET NOT NULL;
+
+
+-- =========================
+-- appointment_events: particionada por mes sobre created_at
+-- (PK (created_at, id): sirve también de índice del feed global)
+-- =========================
+-- Crea las particiones mensuales que falten desde from_month.
+-- Si la partición DEFAULT ya recibió filas de ese mes (faltó correr el
+-- mantenimiento), CREATE TABLE ... PARTITION OF fallaría: en ese caso la
+-- partición se crea suelta, se le mueven esas filas y se engancha.
+CREATE OR REPLACE FUNCTION appointment_events_ensure_partitions(from_month DATE, months INT)
+RETURNS void AS $$
+DECLARE
+  m DATE;
+  m_end DATE;
+  part TEXT;
+  has_default BOOLEAN := to_regclass('appointment_events_default') IS NOT NULL;
+BEGIN
+  FOR i IN 0 .. months - 1 LOOP
+    m := (date_trunc('month', from_month) + make_interval(months => i))::date;
+    m_end := (m + interval '1 month')::date;
+    part := format('appointment_events_%s', to_char(m, 'YYYY_MM'));
+    CONTINUE WHEN to_regclass(part) IS NOT NULL;
+
+    IF has_default THEN
+      -- los inserts del rango esperan: nada entra a DEFAULT mientras se mueve
+      LOCK TABLE appointment_events_default IN ACCESS EXCLUSIVE MODE;
+    END IF;
+
+    IF has_default AND EXISTS (
+      SELECT 1 FROM appointment_events_default
+      WHERE created_at >= m AND created_at < m_end
+    ) THEN
+      EXECUTE format(
+        'CREATE TABLE %I (LIKE appointment_events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        part
+      );
+      EXECUTE format(
+        'WITH moved AS (
+           DELETE FROM appointment_events_default
+           WHERE created_at >= %L AND created_at < %L
+           RETURNING id, appointment_id, event_type, old_value, new_value, note, created_at
+         )
+         INSERT INTO %I (id, appointment_id, event_type, old_value, new_value, note, created_at)
+         SELECT * FROM moved',
+        m, m_end, part
+      );
+      -- ATTACH crea los índices y la FK del padre en la partición nueva
+      EXECUTE format(
+        'ALTER TABLE appointment_events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        part, m, m_end
+      );
+    ELSE
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF appointment_events FOR VALUES FROM (%L) TO (%L)',
+        part, m, m_end
+      );
+    END IF;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- migración desde la tabla sin particionar (idempotente)
+DO $$
+DECLARE
+  first_month DATE;
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM pg_partitioned_table p
+    JOIN pg_class c ON c.oid = p.partrelid
+    WHERE c.relname = 'appointment_events'
+  ) THEN
+    RETURN;
+  END IF;
+
+  ALTER TABLE appointment_events RENAME TO appointment_events_legacy;
+  ALTER TABLE appointment_events_legacy
+    RENAME CONSTRAINT appointment_events_pkey TO appointment_events_legacy_pkey;
+  DROP INDEX IF EXISTS idx_appointment_events_appointment;
+
+  CREATE TABLE appointment_events (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+
+    appointment_id UUID NOT NULL
+      REFERENCES appointments(id) ON DELETE CASCADE,
+
+    event_type TEXT NOT NULL,
+    old_value TEXT,
+    new_value TEXT,
+    note TEXT,
+
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+
+    PRIMARY KEY (created_at, id)
+  ) PARTITION BY RANGE (created_at);
+
+  -- red de seguridad si falta la partición del mes; el mantenimiento
+  -- crea las particiones con anticipación para que quede vacía
+  CREATE TABLE appointment_events_default
+    PARTITION OF appointment_events DEFAULT;
+
+  SELECT COALESCE(min(created_at), now())::date INTO first_month
+  FROM appointment_events_legacy;
+
+  PERFORM appointment_events_ensure_partitions(
+    first_month,
+    (EXTRACT(YEAR FROM age(date_trunc('month', now()), date_trunc('month', first_month))) * 12
+     + EXTRACT(MONTH FROM age(date_trunc('month', now()), date_trunc('month', first_month))))::int + 4
+  );
+
+  INSERT INTO appointment_events
+    (id, appointment_id, event_type, old_value, new_value, note, created_at)
+  SELECT id, appointment_id, event_type, old_value, new_value, note, created_at
+  FROM appointment_events_legacy;
+
+  DROP TABLE appointment_events_legacy;
+END $$;
+
+-- historial por cita y feed filtrado por tipo: filtro + orden del keyset
+CREATE INDEX IF NOT EXISTS idx_appointment_events_appt_created_id
+  ON appointment_events(appointment_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_appointment_events_type_created_id
+  ON appointment_events(event_type, created_at, id);
+
+-- archivo: desengancha las particiones mensuales anteriores a
+-- keep_months meses; quedan como tablas sueltas para pg_dump / DROP.
+-- Retorna los nombres de las tablas desenganchadas.
+CREATE OR REPLACE FUNCTION appointment_events_archive(keep_months INT)
+RETURNS SETOF TEXT AS $$
+DECLARE
+  part RECORD;
+  cutoff DATE := (date_trunc('month', now()) - make_interval(months => keep_months))::date;
+BEGIN
+  FOR part IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    WHERE p.relname = 'appointment_events'
+      AND c.relname ~ '^appointment_events_[0-9]{4}_[0-9]{2}$'
+      AND to_date(substr(c.relname, 20), 'YYYY_MM') < cutoff
+    ORDER BY c.relname
+  LOOP
+    EXECUTE format('ALTER TABLE appointment_events DETACH PARTITION %I', part.relname);
+    RETURN NEXT part.relname;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- =========================
+-- Contadores del dashboard (rollup)
+-- Los mantiene la app en la misma transacción de cada escritura;
+-- `flask appointments reconcile-stats` los recalcula desde cero.
+-- =========================
+CREATE TABLE IF NOT EXISTS appointment_stats (
+  key TEXT PRIMARY KEY,          -- status:<estado> | unpaid | paid:YYYY-MM
+  value BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- carga inicial (solo si la tabla está vacía); paid:YYYY-MM en UTC, la
+-- primera reconciliación lo recalcula con CLINIC_TIMEZONE
+INSERT INTO appointment_stats (key, value)
+SELECT k, n FROM (
+  SELECT 'status:' || status::text AS k, count(*) AS n
+  FROM appointments GROUP BY status
+  UNION ALL
+  SELECT 'unpaid', count(*) FROM appointments WHERE is_paid = FALSE
+  UNION ALL
+  SELECT 'paid:' || to_char(paid_at AT TIME ZONE 'UTC', 'YYYY-MM'), count(*)
+  FROM appointments WHERE is_paid = TRUE AND paid_at IS NOT NULL
+  GROUP BY 1
+) s
+WHERE NOT EXISTS (SELECT 1 FROM appointment_stats);
+
+
+-- =========================
+-- Versionado de cambios para GET condicional (ETag / 304)
+-- Un contador por tabla, incrementado por un trigger POR SENTENCIA:
+-- cubre ORM, SQL crudo y operaciones en lote.
+-- =========================
+CREATE TABLE IF NOT EXISTS change_versions (
+  resource TEXT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO change_versions (resource)
+VALUES ('appointments'), ('planner_items'), ('users')
+ON CONFLICT (resource) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_change_version()
+RETURNS trigger AS $$
+BEGIN
+  UPDATE change_versions
+  SET version = version + 1, updated_at = now()
+  WHERE resource = TG_ARGV[0];
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_appointments_change_version ON appointments;
+CREATE TRIGGER trg_appointments_change_version
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON appointments
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_change_version('appointments');
+
+DROP TRIGGER IF EXISTS trg_planner_items_change_version ON planner_items;
+CREATE TRIGGER trg_planner_items_change_version
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON planner_items
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_change_version('planner_items');
+
+DROP TRIGGER IF EXISTS trg_users_change_version ON users;
+CREATE TRIGGER trg_users_change_version
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON users
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_change_version('users');
+
+
+-- =========================
+-- Feed de cambios (SSE): NOTIFY por fila en el canal app_changes.
+-- Postgres entrega la notificación recién en el COMMIT (nunca si hubo
+-- rollback); cada worker la recibe con LISTEN y la reparte a sus clientes.
+-- =========================
+CREATE SEQUENCE IF NOT EXISTS change_event_seq;
+
+CREATE OR REPLACE FUNCTION notify_app_change()
+RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('app_changes', json_build_object(
+    'id', nextval('change_event_seq'),
+    'table', TG_TABLE_NAME,
+    'op', TG_OP,
+    'row_id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END
+  )::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_appointments_notify ON appointments;
+CREATE TRIGGER trg_appointments_notify
+  AFTER INSERT OR UPDATE OR DELETE ON appointments
+  FOR EACH ROW EXECUTE FUNCTION notify_app_change();
+
+DROP TRIGGER IF EXISTS trg_planner_items_notify ON planner_items;
+CREATE TRIGGER trg_planner_items_notify
+  AFTER INSERT OR UPDATE OR DELETE ON planner_items
+  FOR EACH ROW EXECUTE FUNCTION notify_app_change();
+
+
+-- =========================
+-- Sincronización incremental (/api/sync)
+-- =========================
+-- keyset (updated_at, id) por recurso
+CREATE INDEX IF NOT EXISTS idx_appointments_updated_id
+  ON appointments(updated_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_user_updated_id
+  ON appointments(user_id, updated_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_planner_items_updated_id
+  ON planner_items(updated_at, id);
+
+-- updated_at lo pone SIEMPRE la base, también al INSERT: el default de la
+-- app (datetime.utcnow) usa el reloj del servidor de aplicación y sin zona;
+-- /api/sync compara posiciones contra now() de la base
+DROP TRIGGER IF EXISTS trg_appointments_updated_at ON appointments;
+CREATE TRIGGER trg_appointments_updated_at
+BEFORE INSERT OR UPDATE ON appointments
+FOR EACH ROW
+EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS trg_planner_items_updated_at ON planner_items;
+CREATE TRIGGER trg_planner_items_updated_at
+BEFORE INSERT OR UPDATE ON planner_items
+FOR EACH ROW
+EXECUTE FUNCTION set_updated_at();
+
+-- los borrados siguen siendo físicos; el trigger deja la marca
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  resource TEXT NOT NULL,          -- appointments | planner_items
+  row_id UUID NOT NULL,
+  owner_id UUID,                   -- appointments.user_id / planner_items.created_by
+  deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_deleted_id
+  ON sync_tombstones(deleted_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_owner_deleted_id
+  ON sync_tombstones(owner_id, deleted_at, id);
+
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS trigger AS $$
+BEGIN
+  INSERT INTO sync_tombstones (resource, row_id, owner_id)
+  VALUES (
+    TG_TABLE_NAME,
+    OLD.id,
+    CASE TG_TABLE_NAME
+      WHEN 'appointments' THEN (to_jsonb(OLD)->>'user_id')::uuid
+      ELSE (to_jsonb(OLD)->>'created_by')::uuid
+    END
+  );
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_appointments_tombstone ON appointments;
+CREATE TRIGGER trg_appointments_tombstone
+  AFTER DELETE ON appointments
+  FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone();
+
+DROP TRIGGER IF EXISTS trg_planner_items_tombstone ON planner_items;
+CREATE TRIGGER trg_planner_items_tombstone
+  AFTER DELETE ON planner_items
+  FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone();
+
+-- =========================
+-- Consultas por rango del planner (camino frío del cache por worker)
+-- PlannerService filtra con tstzrange(start_at, end_at, '[]') && rango:
+-- misma expresión que el índice, así el planner de Postgres lo usa.
+-- =========================
+CREATE INDEX IF NOT EXISTS idx_planner_items_range
+  ON planner_items USING gist (tstzrange(start_at, end_at, '[]'));
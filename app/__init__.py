@@ -2,18 +2,24 @@ from flask import Flask
 from flask_cors import CORS
 import os
 
+# app.db (módulo) va antes que extensions.db: así el nombre `db` del
+# paquete queda apuntando a la instancia de Flask-SQLAlchemy
+from .db import database_url, engine_options
 from .extensions import db 
 
-def create_app():
+def create_app(config: dict | None = None):
     app = Flask(__name__)
 
-    app.config["SQLALCHEMY_DATABASE_URI"] = (
-            f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
-            f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-        )
+    # un solo engine (y pool) para el ORM y para el SQL crudo de app.db
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url()
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options()
     
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # overrides (p.ej. los tests usan SQLite en memoria)
+    if config:
+        app.config.update(config)
+
     db.init_app(app) 
 
     CORS(
@@ -22,6 +28,7 @@ def create_app():
         supports_credentials=True,
         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
         allow_headers=["Content-Type", "Authorization"],
+        expose_headers=["X-Next-Cursor", "ETag"],
     )
 
     from .routes.patients_routes import bp as patients_bp
@@ -30,13 +37,27 @@ def create_app():
     from .routes.site_routes import site_bp
     from .routes.chatbot_routes import bp as chatbot_bp
     from .routes.planner_routes import bp as planner_bp
+    from .routes.ops_routes import bp as ops_bp
+    from .routes.availability_routes import bp as availability_bp
+    from .routes.events_routes import bp as events_bp
+    from .routes.sync_routes import bp as sync_bp
 
 
     app.register_blueprint(patients_bp, url_prefix="/api/patients")
     app.register_blueprint(appointments_bp, url_prefix="/api/appointments")
     app.register_blueprint(planner_bp, url_prefix="/api/planner")
+    app.register_blueprint(availability_bp, url_prefix="/api/availability")
     app.register_blueprint(chatbot_bp, url_prefix="/chatbot") 
     app.register_blueprint(auth_bp)
     app.register_blueprint(site_bp)
+    app.register_blueprint(ops_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(sync_bp)
+
+    # el chatbot carga sklearn de forma diferida; CHATBOT_WARMUP=1 lo
+    # carga al arrancar en lugar de hacerlo en el primer mensaje
+    if os.getenv("CHATBOT_WARMUP", "0") == "1":
+        from .services.chatbot_service import ChatbotService
+        ChatbotService.warm_up()
     
     return app
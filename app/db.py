@@ -1,5 +1,7 @@
-import psycopg2
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -7,11 +9,90 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env", override=True)
 
-def get_connection():
-    return psycopg2.connect(
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        host=os.getenv("DB_HOST"),
-        port=os.getenv("DB_PORT"),
+# Capa única de acceso a datos: Flask-SQLAlchemy (ORM) y el SQL crudo de
+# AuthService/SiteService sacan conexiones del MISMO engine y pool.
+# Conexiones máximas por worker = DB_POOL_SIZE + DB_MAX_OVERFLOW.
+
+
+def database_url() -> str:
+    return (
+        f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
+        f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
     )
+
+
+def engine_options() -> dict:
+    """Opciones del pool del engine, configurables por entorno."""
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "5")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+        "pool_use_lifo": True,
+    }
+
+
+_wait_lock = threading.Lock()
+_wait_stats = {"checkouts": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+
+@contextmanager
+def get_connection():
+    """
+    Conexión DBAPI (psycopg2) del pool del engine compartido:
+
+        with get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur: ...
+
+    Hace commit al salir (rollback si hubo excepción) y devuelve la
+    conexión al pool. Requiere app context (lo hay en cualquier request).
+    Si el pool se agota lanza sqlalchemy.exc.TimeoutError.
+    """
+    from .extensions import db
+
+    t0 = time.monotonic()
+    conn = db.engine.raw_connection()
+    wait = time.monotonic() - t0
+    with _wait_lock:
+        _wait_stats["checkouts"] += 1
+        _wait_stats["wait_total"] += wait
+        _wait_stats["wait_max"] = max(_wait_stats["wait_max"], wait)
+
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        try:
+            conn.rollback()
+        except Exception:
+            # conexión rota: invalidarla para que el pool no la reutilice
+            conn.invalidate()
+        raise
+    finally:
+        conn.close()  # vuelve al pool
+
+
+def pool_stats() -> dict:
+    """Estado del pool del engine en este worker."""
+    from .extensions import db
+
+    pool = db.engine.pool
+    with _wait_lock:
+        checkouts = _wait_stats["checkouts"]
+        wait_total = _wait_stats["wait_total"]
+        wait_max = _wait_stats["wait_max"]
+
+    opts = engine_options()
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": opts["max_overflow"],
+        "max_connections": pool.size() + opts["max_overflow"],
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "raw_checkouts": checkouts,
+        "raw_wait_avg_ms": (wait_total / checkouts * 1000) if checkouts else 0.0,
+        "raw_wait_max_ms": wait_max * 1000,
+        "status": pool.status(),
+    }
@@ -5,6 +5,9 @@ from .time_off import TherapistTimeOff
 from .appointment_event import AppointmentEvent
 from .user import User
 from .planner_item import PlannerItem 
+from .appointment_stat import AppointmentStat
+from .change_version import ChangeVersion
+from .sync_tombstone import SyncTombstone
 
 __all__ = [
     "Patient",
@@ -14,4 +17,7 @@ __all__ = [
     "AppointmentEvent",
     "User",
     "PlannerItem",
+    "AppointmentStat",
+    "ChangeVersion",
+    "SyncTombstone",
 ]
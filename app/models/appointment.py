@@ -3,10 +3,23 @@ import uuid
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
 from ..extensions import db
-from app.utils.appointments_fields import pack_fields, unpack_fields
 
 class Appointment(db.Model):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # keyset (created_at, id) del listado, global y por filtro
+        db.Index("idx_appointments_created_id", "created_at", "id"),
+        db.Index("idx_appointments_user_created_id", "user_id", "created_at", "id"),
+        db.Index("idx_appointments_status_created_id", "status", "created_at", "id"),
+        db.Index(
+            "idx_appointments_unpaid_created_id", "created_at", "id",
+            postgresql_where=db.text("is_paid = FALSE"),
+        ),
+        db.Index("idx_appointments_requested_start", "requested_start"),
+        # /api/sync: keyset (updated_at, id), global y por paciente
+        db.Index("idx_appointments_updated_id", "updated_at", "id"),
+        db.Index("idx_appointments_user_updated_id", "user_id", "updated_at", "id"),
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -14,7 +27,11 @@ class Appointment(db.Model):
 
     user = db.relationship("User", backref="appointments", lazy=True)
 
+    # columnas reales (antes empaquetadas como JSON dentro de `comment`);
+    # ver la migración al final de FisioterapiaRH_ProyIng.sql
+    description = db.Column(db.Text, nullable=False, default="")
     comment = db.Column(db.Text, nullable=True)
+    considerations = db.Column(db.Text, nullable=True)
 
     requested_start = db.Column(db.DateTime(timezone=True), nullable=True)
     requested_end = db.Column(db.DateTime(timezone=True), nullable=True)
@@ -28,15 +45,17 @@ class Appointment(db.Model):
     paid_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    # lo pone la base (trigger set_updated_at, también al INSERT): /api/sync
+    # lo compara contra now() de la base, no contra el reloj de la app
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
 
     def to_dict(self):
         return {
             "id": str(self.id),
             "user_id": str(self.user_id),
-            "description": self.comment.split("\n")[0] if self.comment else "",
-            "comment": self.comment.split("\n")[1] if self.comment and len(self.comment.split("\n")) > 1 else None,
-            "considerations": self.comment.split("\n")[2] if self.comment and len(self.comment.split("\n")) > 2 else None,
+            "description": self.description or "",
+            "comment": self.comment,
+            "considerations": self.considerations,
             "requested_start": self.requested_start.isoformat() if self.requested_start else None,
             "requested_end": self.requested_end.isoformat() if self.requested_end else None,
             "scheduled_start": self.scheduled_start.isoformat() if self.scheduled_start else None,
@@ -5,7 +5,15 @@ from ..extensions import db
 
 class AppointmentEvent(db.Model):
     __tablename__ = "appointment_events"
+    __table_args__ = (
+        # la PK (created_at, id) es también el índice del feed global;
+        # estos cubren filtro + orden del keyset (ver FisioterapiaRH_ProyIng.sql)
+        db.Index("idx_appointment_events_appt_created_id", "appointment_id", "created_at", "id"),
+        db.Index("idx_appointment_events_type_created_id", "event_type", "created_at", "id"),
+    )
 
+    # en Postgres la tabla está particionada por mes sobre created_at,
+    # por eso created_at forma parte de la PK
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     appointment_id = db.Column(UUID(as_uuid=True), db.ForeignKey("appointments.id", ondelete="CASCADE"), nullable=False)
 
@@ -14,4 +22,15 @@ class AppointmentEvent(db.Model):
     new_value = db.Column(db.Text, nullable=True)
     note = db.Column(db.Text, nullable=True)
 
-    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), primary_key=True, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "appointment_id": str(self.appointment_id),
+            "event_type": self.event_type,
+            "old_value": self.old_value,
+            "new_value": self.new_value,
+            "note": self.note,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
@@ -0,0 +1,15 @@
+from datetime import datetime
+from ..extensions import db
+
+class AppointmentStat(db.Model):
+    """
+    Contadores agregados de citas (rollup). Claves:
+      status:<estado>   citas por estado
+      unpaid            citas sin pagar
+      paid:YYYY-MM      citas marcadas como pagadas en ese mes
+    """
+    __tablename__ = "appointment_stats"
+
+    key = db.Column(db.Text, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
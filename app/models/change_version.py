@@ -0,0 +1,13 @@
+from datetime import datetime
+from ..extensions import db
+
+class ChangeVersion(db.Model):
+    """
+    Contador de cambios por tabla. Lo incrementan triggers por sentencia
+    en Postgres (ver FisioterapiaRH_ProyIng.sql); la app solo lo lee.
+    """
+    __tablename__ = "change_versions"
+
+    resource = db.Column(db.Text, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
@@ -6,6 +6,12 @@ from ..extensions import db
 
 class PlannerItem(db.Model):
     __tablename__ = "planner_items"
+    __table_args__ = (
+        # /api/sync: keyset (updated_at, id)
+        db.Index("idx_planner_items_updated_id", "updated_at", "id"),
+        # consultas por rango: índice GiST sobre tstzrange(start_at, end_at, '[]'),
+        # solo Postgres (ver FisioterapiaRH_ProyIng.sql)
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -25,7 +31,9 @@ class PlannerItem(db.Model):
     appointment_id = db.Column(UUID(as_uuid=True), db.ForeignKey("appointments.id"), nullable=True)
 
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    # lo pone la base (trigger set_updated_at, también al INSERT): /api/sync
+    # lo compara contra now() de la base, no contra el reloj de la app
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
 
     def to_dict(self):
         return {
@@ -0,0 +1,22 @@
+import uuid
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+from ..extensions import db
+
+class SyncTombstone(db.Model):
+    """
+    Marca de borrado para /api/sync: appointments y planner_items se borran
+    de verdad y un trigger AFTER DELETE deja acá (resource, row_id).
+    owner_id permite filtrar las marcas de citas por paciente.
+    """
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        db.Index("idx_sync_tombstones_deleted_id", "deleted_at", "id"),
+        db.Index("idx_sync_tombstones_owner_deleted_id", "owner_id", "deleted_at", "id"),
+    )
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    resource = db.Column(db.Text, nullable=False)  # appointments | planner_items
+    row_id = db.Column(UUID(as_uuid=True), nullable=False)
+    owner_id = db.Column(UUID(as_uuid=True), nullable=True)
+    deleted_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
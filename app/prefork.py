@@ -0,0 +1,39 @@
+# app/prefork.py
+"""
+Hooks de ciclo de vida para servidores pre-fork (gunicorn con preload_app).
+
+- warm_up_master(app): corre en el master ANTES del fork. Carga todo lo que
+  es de solo lectura y caro de construir (modelo del chatbot, tablas de
+  normalización, rutas compiladas, encoder JSON) para que los workers lo
+  hereden copy-on-write.
+- init_worker(app): corre en cada worker DESPUÉS del fork. Descarta
+  cualquier conexión heredada del master: cada worker abre su propio pool.
+"""
+import gc
+
+
+def warm_up_master(app) -> None:
+    from .services.chatbot_service import ChatbotService
+
+    ChatbotService.warm_up()
+
+    with app.test_request_context():
+        # compila el mapa de rutas de werkzeug y el encoder JSON de Flask
+        app.url_map.bind("localhost").match("/chatbot/message", method="POST")
+        app.json.dumps({"warm": True, "n": 1, "x": [1.0, None, "á"]})
+
+    # todo lo cargado hasta acá queda fuera del GC: evita que los recorridos
+    # del recolector toquen esas páginas y rompan el copy-on-write
+    gc.collect()
+    gc.freeze()
+
+
+def init_worker(app) -> None:
+    from .extensions import db
+
+    # un solo engine para ORM y SQL crudo (app.db): descartar su pool
+    # heredado alcanza para que el worker arranque limpio
+    with app.app_context():
+        # close=False: no cerrar los sockets que pudiera tener el master,
+        # solo olvidarlos; el worker abre conexiones nuevas bajo demanda
+        db.engine.dispose(close=False)
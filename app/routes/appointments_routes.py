@@ -1,9 +1,17 @@
-from flask import Blueprint, request, jsonify, g
-from datetime import datetime
+import csv
+import json
+import click
+from flask import Blueprint, Response, request, jsonify, g, stream_with_context
+from datetime import datetime, timezone
 
 from ..services.appointments_service import AppointmentsService
+from ..services.conflict_service import ScheduleConflict
+from ..services.stats_service import StatsService
+from ..services.version_service import VersionService
 from ..models import Appointment
 from ..utils.auth_required import auth_required, admin_required
+from ..utils.pagination import parse_limit
+from ..utils.conditional import not_modified, tag_private
 
 bp = Blueprint("appointments", __name__)
 
@@ -12,20 +20,220 @@ def parse_dt(value: str | None):
     if not value:
         return None
     value = value.replace("Z", "+00:00")
-    return datetime.fromisoformat(value)
+    dt = datetime.fromisoformat(value)
+    # siempre aware en UTC: sin tzinfo se asume UTC (igual que intervals.to_minutes),
+    # así un lote que mezcla ambos formatos se puede comparar
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def parse_bool(value: str | None):
+    if value is None or value == "":
+        return None
+    v = value.strip().lower()
+    if v in ("1", "true", "yes", "si"):
+        return True
+    if v in ("0", "false", "no"):
+        return False
+    raise ValueError(f"valor booleano inválido: {value}")
 
 
 @bp.get("/")
 @auth_required
 def list_appointments():
-    status = request.args.get("status")
+    """
+    Query params (todos opcionales):
+      status=requested,confirmed   uno o varios estados
+      is_paid=true|false
+      scheduled_from, scheduled_to, requested_from, requested_to (ISO, [from, to))
+      limit (default 100, 1..500; fuera de rango => 400), cursor (de X-Next-Cursor)
+    El cuerpo sigue siendo una lista, SIEMPRE paginada (aunque no se pase
+    limit): la página siguiente se pide con el cursor del header
+    X-Next-Cursor, ausente solo en la última página.
+    Con If-None-Match responde 304 si appointments/users no cambiaron.
+    """
     user_id = request.args.get("user_id")
 
     if g.role != "admin":
         user_id = g.user_id  
 
-    appts = AppointmentsService.list_appointments(status=status, user_id=user_id)
-    return jsonify([a.to_dict() for a in appts]), 200
+    # to_dict() incluye users.full_name: también depende de esa tabla
+    etag = VersionService.etag(
+        ("appointments", "users"), g.role, str(user_id), request.query_string
+    )
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    status = request.args.get("status")
+    statuses = [s.strip() for s in status.split(",") if s.strip()] if status else None
+
+    try:
+        appts, next_cursor = AppointmentsService.list_appointments(
+            status=statuses,
+            user_id=user_id,
+            limit=parse_limit(request.args.get("limit")),
+            cursor=request.args.get("cursor") or None,
+            is_paid=parse_bool(request.args.get("is_paid")),
+            scheduled_from=parse_dt(request.args.get("scheduled_from")),
+            scheduled_to=parse_dt(request.args.get("scheduled_to")),
+            requested_from=parse_dt(request.args.get("requested_from")),
+            requested_to=parse_dt(request.args.get("requested_to")),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resp = jsonify([a.to_dict() for a in appts])
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return tag_private(resp, etag), 200
+
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_CHUNK_ROWS = 500
+
+
+class _Echo:
+    # csv.writer escribe en un "archivo" que devuelve la línea en vez de guardarla
+    def write(self, value):
+        return value
+
+
+def _export_value(v):
+    if v is None:
+        return None
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, bool):
+        return v
+    return str(v)
+
+
+def _export_lines(rows, fmt):
+    columns = AppointmentsService.EXPORT_COLUMNS
+    writer = csv.writer(_Echo())
+
+    if fmt == "csv":
+        yield writer.writerow(columns)
+
+    chunk = []
+    for row in rows:
+        values = [_export_value(v) for v in row]
+        if fmt == "csv":
+            chunk.append(writer.writerow(["" if v is None else v for v in values]))
+        else:
+            chunk.append(json.dumps(dict(zip(columns, values)), ensure_ascii=False) + "\n")
+
+        # unas cientos de filas por write: menos overhead que una por fila
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+
+    if chunk:
+        yield "".join(chunk)
+
+
+@bp.get("/export")
+@auth_required
+@admin_required
+def export_appointments():
+    """
+    Export contable en streaming (admin). Query params:
+      format=csv|ndjson (default csv)
+      status, is_paid, created_from/created_to, scheduled_from/scheduled_to,
+      requested_from/requested_to (ISO, [from, to))
+    """
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": "format debe ser csv o ndjson"}), 400
+
+    status = request.args.get("status")
+    try:
+        filters = {
+            "status": [s.strip() for s in status.split(",") if s.strip()] if status else None,
+            "is_paid": parse_bool(request.args.get("is_paid")),
+            "created_from": parse_dt(request.args.get("created_from")),
+            "created_to": parse_dt(request.args.get("created_to")),
+            "scheduled_from": parse_dt(request.args.get("scheduled_from")),
+            "scheduled_to": parse_dt(request.args.get("scheduled_to")),
+            "requested_from": parse_dt(request.args.get("requested_from")),
+            "requested_to": parse_dt(request.args.get("requested_to")),
+        }
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = AppointmentsService.export_rows(**filters)
+    filename = f"appointments-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+
+    # stream_with_context mantiene el app context (y la sesión con el
+    # cursor del servidor abierto) mientras el generador produce filas
+    return Response(
+        stream_with_context(_export_lines(rows, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@bp.get("/stats")
+@auth_required
+@admin_required
+def appointment_stats():
+    # contadores de appointment_stats: lectura por PK, sin recorrer citas
+    return jsonify(StatsService.get_stats()), 200
+
+
+@bp.get("/events")
+@auth_required
+@admin_required
+def list_all_events():
+    """
+    Feed de auditoría global (admin). Query params opcionales:
+      event_type, created_from, created_to (ISO, [from, to)), limit, cursor
+    Misma paginación que el listado: lista + header X-Next-Cursor.
+    """
+    try:
+        events, next_cursor = AppointmentsService.list_events(
+            event_type=request.args.get("event_type") or None,
+            created_from=parse_dt(request.args.get("created_from")),
+            created_to=parse_dt(request.args.get("created_to")),
+            limit=parse_limit(request.args.get("limit")),
+            cursor=request.args.get("cursor") or None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resp = jsonify([e.to_dict() for e in events])
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp, 200
+
+
+@bp.get("/<uuid:appointment_id>/events")
+@auth_required
+def list_appointment_events(appointment_id):
+    owner = AppointmentsService.owner_id(appointment_id)
+    if owner is None:
+        return jsonify({"error": "Cita no encontrada"}), 404
+    if g.role != "admin" and str(owner) != str(g.user_id):
+        return jsonify({"error": "No autorizado para ver esta cita"}), 403
+
+    try:
+        events, next_cursor = AppointmentsService.list_events(
+            appointment_id=appointment_id,
+            limit=parse_limit(request.args.get("limit")),
+            cursor=request.args.get("cursor") or None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resp = jsonify([e.to_dict() for e in events])
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp, 200
 
 
 @bp.post("/")
@@ -56,8 +264,13 @@ def confirm_appointment(appointment_id):
 
     if not scheduled_start or not scheduled_end:
         return jsonify({"error": "scheduled_start and scheduled_end are required"}), 400
+    if scheduled_end <= scheduled_start:
+        return jsonify({"error": "scheduled_end must be greater than scheduled_start"}), 400
 
-    appt = AppointmentsService.admin_confirm(appointment_id, scheduled_start, scheduled_end)
+    try:
+        appt = AppointmentsService.admin_confirm(appointment_id, scheduled_start, scheduled_end)
+    except ScheduleConflict as e:
+        return jsonify({"error": "El horario se superpone con la agenda", "conflicts": e.conflicts}), 409
     return jsonify(appt.to_dict()), 200
 
 
@@ -96,3 +309,92 @@ def delete_appointment(appointment_id):
 
     AppointmentsService.delete_appointment(appointment_id)
     return jsonify({"ok": True}), 200
+
+
+MAX_BULK = 500
+
+
+def _bulk_ids(payload):
+    ids = payload.get("ids") if isinstance(payload, dict) else None
+    if not isinstance(ids, list) or not ids:
+        return None, (jsonify({"error": "ids debe ser una lista no vacía"}), 400)
+    if len(ids) > MAX_BULK:
+        return None, (jsonify({"error": f"máximo {MAX_BULK} citas por lote"}), 400)
+    return ids, None
+
+
+@bp.post("/bulk/confirm")
+@auth_required
+@admin_required
+def bulk_confirm_appointments():
+    payload = request.get_json(force=True) or {}
+    items = payload.get("items") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items or not all(isinstance(i, dict) for i in items):
+        return jsonify({"error": "items debe ser una lista de {id, scheduled_start, scheduled_end}"}), 400
+    if len(items) > MAX_BULK:
+        return jsonify({"error": f"máximo {MAX_BULK} citas por lote"}), 400
+
+    try:
+        for it in items:
+            it["scheduled_start"] = parse_dt(it.get("scheduled_start"))
+            it["scheduled_end"] = parse_dt(it.get("scheduled_end"))
+    except ValueError:
+        return jsonify({"error": "scheduled_start/scheduled_end deben ser ISO"}), 400
+
+    try:
+        results = AppointmentsService.bulk_confirm(items)
+    except ScheduleConflict as e:
+        return jsonify({
+            "error": "Alguna cita se superpone con la agenda; no se aplicó ningún cambio",
+            "conflicts": e.conflicts,
+        }), 409
+
+    return jsonify({"results": results}), 200
+
+
+@bp.post("/bulk/mark-paid")
+@auth_required
+@admin_required
+def bulk_mark_paid():
+    ids, error = _bulk_ids(request.get_json(force=True) or {})
+    if error:
+        return error
+    return jsonify({"results": AppointmentsService.bulk_mark_paid(ids)}), 200
+
+
+@bp.post("/bulk/delete")
+@auth_required
+@admin_required
+def bulk_delete_appointments():
+    ids, error = _bulk_ids(request.get_json(force=True) or {})
+    if error:
+        return error
+    return jsonify({"results": AppointmentsService.bulk_delete(ids)}), 200
+
+
+@bp.cli.command("event-partitions")
+@click.option("--months-ahead", default=3, show_default=True, help="Meses futuros a crear.")
+def event_partitions(months_ahead):
+    """Crea las particiones mensuales de appointment_events (correr mensualmente)."""
+    AppointmentsService.ensure_event_partitions(months_ahead)
+    click.echo(f"particiones de appointment_events listas hasta +{months_ahead} meses")
+
+
+@bp.cli.command("archive-events")
+@click.option("--keep-months", default=12, show_default=True, help="Meses que quedan en la tabla viva.")
+def archive_events(keep_months):
+    """Desengancha las particiones viejas de appointment_events para archivarlas."""
+    detached = AppointmentsService.archive_events(keep_months)
+    for name in detached:
+        click.echo(f"desenganchada: {name} (pg_dump -t {name} y luego DROP TABLE)")
+    if not detached:
+        click.echo("nada para archivar")
+
+
+@bp.cli.command("reconcile-stats")
+def reconcile_stats():
+    """Recalcula appointment_stats desde appointments (correr p. ej. cada noche)."""
+    drift = StatsService.reconcile()
+    for key, (before, after) in sorted(drift.items()):
+        click.echo(f"{key}: {before} -> {after}")
+    click.echo("contadores al día" if not drift else f"{len(drift)} contadores corregidos")
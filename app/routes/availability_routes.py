@@ -0,0 +1,42 @@
+# app/routes/availability_routes.py
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+
+from ..services.availability_service import AvailabilityService
+from ..utils.auth_required import auth_required
+
+bp = Blueprint("availability", __name__)
+
+
+def parse_dt(value: str | None):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@bp.get("/")
+@auth_required
+def list_free_slots():
+    """
+    Query params:
+      from, to   rango ISO con zona, [from, to) (máx. AVAILABILITY_MAX_RANGE_DAYS)
+      duration   minutos de la cita (requerido)
+      step       separación entre inicios de slots en minutos (default: duration)
+    """
+    try:
+        date_from = parse_dt(request.args.get("from"))
+        date_to = parse_dt(request.args.get("to"))
+        duration = request.args.get("duration", type=int)
+        step = request.args.get("step", type=int)
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO datetimes"}), 400
+
+    if not date_from or not date_to or not duration:
+        return jsonify({"error": "from, to and duration are required"}), 400
+
+    try:
+        result = AvailabilityService.find_free(date_from, date_to, duration, step=step)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(result), 200
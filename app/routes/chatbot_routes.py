@@ -1,6 +1,8 @@
 # app/routes/chatbot_routes.py
+import click
 from flask import Blueprint, request, jsonify
 from ..services.chatbot_service import ChatbotService
+from ..utils.auth_required import auth_required, admin_required
 
 bp = Blueprint("chatbot", __name__)
 
@@ -11,6 +13,8 @@ def chatbot_message():
     context = payload.get("context")  # <-- nuevo
 
     result = ChatbotService.reply(message=message, context=context)
+    if "error" in result:
+        return jsonify({"error": result["error"]}), 400
 
     return jsonify({
         "message": message,
@@ -18,5 +22,70 @@ def chatbot_message():
         "context": result["next_context"],  # <-- devolvemos el siguiente contexto
         # opcional para debug (podés quitarlo)
         "tag": result.get("tag"),
-        "score": result.get("score")
+        "score": result.get("score"),
+        "tier": result.get("tier")
     }), 200
+
+
+MAX_BATCH = 1000
+
+@bp.post("/messages")
+def chatbot_messages():
+    payload = request.get_json(force=True)
+
+    # acepta [{message, context}, ...] o {"messages": [...]}
+    items = payload.get("messages") if isinstance(payload, dict) else payload
+
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        return jsonify({"error": "messages debe ser una lista de {message, context}"}), 400
+
+    if len(items) > MAX_BATCH:
+        return jsonify({"error": f"máximo {MAX_BATCH} mensajes por lote"}), 400
+
+    results = ChatbotService.reply_many(items)
+
+    # un item inválido no tumba el lote: se informa en su posición
+    return jsonify([
+        {"message": item.get("message"), "ok": False, "error": result["error"]}
+        if "error" in result else
+        {
+            "message": item.get("message", ""),
+            "ok": True,
+            "response": result["response"],
+            "context": result["next_context"],
+            "tag": result.get("tag"),
+            "score": result.get("score"),
+            "tier": result.get("tier")
+        }
+        for item, result in zip(items, results)
+    ]), 200
+
+
+@bp.get("/cache-stats")
+@auth_required
+@admin_required
+def chatbot_cache_stats():
+    return jsonify(ChatbotService.cache_stats()), 200
+
+
+@bp.post("/reload")
+@auth_required
+@admin_required
+def chatbot_reload():
+    ChatbotService.reload(force=True)
+    return jsonify(ChatbotService.model_info()), 200
+
+
+@bp.cli.command("compile")
+@click.option("--output", default=None, help="Ruta del artefacto (por defecto CHATBOT_ARTIFACT_PATH).")
+def chatbot_compile(output):
+    """Compila intents.json al artefacto binario del chatbot."""
+    try:
+        info = ChatbotService.compile_artifact(output)
+    except ValueError as e:
+        # sin traceback: mensaje y código de salida 1
+        raise click.ClickException(str(e))
+    click.echo(
+        f"{info['path']}: {info['patterns']} patrones, {info['features']} features "
+        f"(intents sha256 {info['source_sha256'][:12]})"
+    )
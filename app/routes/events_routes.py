@@ -0,0 +1,105 @@
+# app/routes/events_routes.py
+import json
+import os
+import queue
+import time
+
+from flask import Blueprint, Response, g, jsonify, request
+
+from app.extensions import db
+from app.services import change_feed
+from app.services.change_feed import RESET, ChangeFeed, TooManySubscribers
+from app.services.jwt_service import STREAM_TOKEN_SECONDS, create_stream_token
+from app.utils.auth_required import admin_required, auth_required, stream_auth_required
+
+bp = Blueprint("events", __name__, url_prefix="/api/events")
+
+HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# corta la conexión cada tanto: libera el hilo/greenlet y el cliente
+# reconecta con un stream_token nuevo y ?last_event_id=
+MAX_STREAM_SECONDS = float(os.getenv("SSE_MAX_STREAM_SECONDS", "600"))
+RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
+
+
+def _format(event: dict) -> str:
+    if event is RESET:
+        return 'event: reset\ndata: {"type": "reset"}\n\n'
+    return f"id: {event['id']}\nevent: change\ndata: {json.dumps(event)}\n\n"
+
+
+def _stream(sub, backlog):
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        for event in backlog:
+            yield _format(event)
+
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            if sub.overflowed:
+                # cliente lento: cerrar; al reconectar se pone al día desde el historial
+                return
+            try:
+                event = sub.queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                # comentario SSE: mantiene viva la conexión en proxies
+                yield ": ping\n\n"
+                continue
+            yield _format(event)
+    finally:
+        ChangeFeed.unsubscribe(sub)
+
+
+@bp.post("/stream-token")
+@auth_required
+@admin_required
+def stream_token():
+    """
+    Token de vida corta (SSE_TOKEN_TTL_SECONDS) para abrir el stream como
+    ?stream_token=: solo sirve para /stream y solo para conectar; pedir
+    uno nuevo en cada (re)conexión.
+    """
+    token = create_stream_token(str(g.user_id), g.email, g.role)
+    resp = jsonify({"stream_token": token, "expires_in": STREAM_TOKEN_SECONDS})
+    resp.headers["Cache-Control"] = "no-store"
+    return resp, 200
+
+
+@bp.get("/stream")
+@stream_auth_required
+@admin_required
+def stream_changes():
+    """
+    SSE con eventos `change` {"id", "table", "op", "row_id"} de appointments
+    y planner_items, y `reset` cuando el cliente debe recargar los listados.
+    Reanuda desde el header Last-Event-ID (o ?last_event_id=) con el
+    historial de ESTE worker.
+    """
+    if change_feed.MAX_SUBSCRIBERS == 0:
+        # perfil sync: un stream tomaría el worker entero hasta que el arbiter lo mate
+        return jsonify({"error": "SSE no disponible con este perfil de servidor (usar gthread o gevent)"}), 501
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        sub, backlog = ChangeFeed.subscribe(last_event_id, engine=db.engine)
+    except TooManySubscribers:
+        resp = jsonify({"error": "Demasiados streams abiertos en este worker"})
+        resp.headers["Retry-After"] = str(RETRY_MS // 1000 or 1)
+        return resp, 503
+
+    # el generador no usa el app context ni la base: no retiene conexiones
+    return Response(
+        _stream(sub, backlog),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx: no bufferear el stream
+        },
+    )
+
+
+@bp.get("/stats")
+@auth_required
+@admin_required
+def stream_stats():
+    # estado del feed en el worker que atiende el request
+    return jsonify(ChangeFeed.stats()), 200
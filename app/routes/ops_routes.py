@@ -0,0 +1,21 @@
+# app/routes/ops_routes.py
+from flask import Blueprint, jsonify
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app.db import pool_stats
+from app.utils.auth_required import auth_required, admin_required
+
+bp = Blueprint("ops", __name__, url_prefix="/api/ops")
+
+
+@bp.get("/db-pool")
+@auth_required
+@admin_required
+def db_pool_stats():
+    # stats del worker que atiende el request (cada worker tiene su pool)
+    return jsonify(pool_stats()), 200
+
+
+@bp.app_errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    return jsonify({"error": "Servicio saturado, intentá de nuevo en unos segundos"}), 503
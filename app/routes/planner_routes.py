@@ -1,15 +1,22 @@
 # app/routes/planner_routes.py
 from flask import Blueprint, request, jsonify
-from datetime import datetime
+from datetime import datetime, timezone
 from ..services.planner_service import PlannerService
+from ..services.conflict_service import ScheduleConflict
+from ..services.version_service import VersionService
+from ..utils.conditional import not_modified, tag_private
+from ..utils.auth_required import auth_required, admin_required
 
 bp = Blueprint("planner", __name__)
 
 def parse_dt(value: str | None):
     if not value:
         return None
-    # acepta ISO: "2025-12-28T09:00:00.000Z"
-    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # acepta ISO: "2025-12-28T09:00:00.000Z"; sin tzinfo se asume UTC
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
 
 @bp.get("/")
 def list_planner_items():
@@ -20,8 +27,24 @@ def list_planner_items():
     if not date_from or not date_to:
         return jsonify({"error": "from and to are required (ISO)"}), 400
 
-    items = PlannerService.list_items(date_from, date_to, kind=kind)
-    return jsonify([i.to_dict() for i in items]), 200
+    # el frontend hace polling: 304 sin consultar filas si nada cambió
+    versions = VersionService.versions(("planner_items",))
+    etag = VersionService.etag(("planner_items",), request.query_string, versions=versions)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    # la misma versión valida el cache de rangos del worker
+    items = PlannerService.list_items(
+        date_from, date_to, kind=kind, version=versions.get("planner_items")
+    )
+    return tag_private(jsonify(items), etag), 200
+
+@bp.get("/cache-stats")
+@auth_required
+@admin_required
+def planner_cache_stats():
+    return jsonify(PlannerService.cache_stats()), 200
 
 @bp.post("/")
 def create_planner_item():
@@ -33,6 +56,8 @@ def create_planner_item():
     try:
         item = PlannerService.create_item(payload)
         return jsonify(item.to_dict()), 201
+    except ScheduleConflict as e:
+        return jsonify({"error": "El horario se superpone con la agenda", "conflicts": e.conflicts}), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
@@ -48,6 +73,8 @@ def update_planner_item(item_id):
     try:
         item = PlannerService.update_item(item_id, payload)
         return jsonify(item.to_dict()), 200
+    except ScheduleConflict as e:
+        return jsonify({"error": "El horario se superpone con la agenda", "conflicts": e.conflicts}), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
@@ -1,13 +1,31 @@
+import os
 from flask import Blueprint, jsonify, request
 from app.services.site_service import SiteService
 from app.utils.auth_required import auth_required
 
 site_bp = Blueprint("site", __name__, url_prefix="/site")
 
+# browsers/CDN pueden guardar la respuesta este tiempo y después
+# revalidar con If-None-Match (304 servido desde el cache del worker)
+SITE_MAX_AGE = int(os.getenv("SITE_CACHE_MAX_AGE", "60"))
+
+
+def _conditional_json(data, etag):
+    resp = jsonify(data)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = SITE_MAX_AGE
+    resp.cache_control.must_revalidate = True
+    if etag:
+        resp.set_etag(etag)
+        # 304 sin cuerpo si If-None-Match coincide
+        return resp.make_conditional(request)
+    return resp
+
+
 @site_bp.get("/info")
 def get_info():
-    data = SiteService.get_info()
-    return jsonify(data or {"info": ""})
+    data, etag = SiteService.get_info_entry()
+    return _conditional_json(data or {"info": ""}, etag)
 
 @site_bp.put("/info")
 @auth_required
@@ -21,8 +39,8 @@ def update_info():
 
 @site_bp.get("/location")
 def get_location():
-    data = SiteService.get_location()
-    return jsonify(data or {"location": ""})
+    data, etag = SiteService.get_location_entry()
+    return _conditional_json(data or {"location": ""}, etag)
 
 @site_bp.put("/location")
 @auth_required
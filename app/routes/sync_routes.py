@@ -0,0 +1,49 @@
+# app/routes/sync_routes.py
+import click
+from flask import Blueprint, g, jsonify, request
+
+from app.services.sync_service import SyncCursorExpired, SyncService
+from app.utils.auth_required import auth_required
+from app.utils.pagination import parse_limit
+
+bp = Blueprint("sync", __name__, url_prefix="/api/sync")
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+
+@bp.get("")
+@auth_required
+def sync_changes():
+    """
+    GET /api/sync?since=<cursor>&limit=500 (entre 1 y 2000; fuera de rango, 400)
+    Sin since: snapshot completo (paginado). Respuesta:
+      {"appointments": [...], "planner_items": [...],
+       "deleted": {"appointments": [ids], "planner_items": [ids]},
+       "cursor": "...", "has_more": bool}
+    Con has_more, volver a pedir con el cursor nuevo hasta que sea false.
+    410: cursor demasiado viejo, resincronizar sin since.
+    """
+    try:
+        limit = parse_limit(request.args.get("limit"), default=DEFAULT_LIMIT, maximum=MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # pacientes: solo sus citas; admin: todo
+    user_id = None if g.role == "admin" else g.user_id
+
+    try:
+        result = SyncService.changes(request.args.get("since") or None, user_id=user_id, limit=limit)
+    except SyncCursorExpired:
+        return jsonify({"error": "cursor expirado, resincronizar sin since"}), 410
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(result), 200
+
+
+@bp.cli.command("purge-tombstones")
+def purge_tombstones():
+    """Borra las marcas de borrado más viejas que SYNC_TOMBSTONE_RETENTION_DAYS."""
+    n = SyncService.purge_tombstones()
+    click.echo(f"{n} tombstones borrados")
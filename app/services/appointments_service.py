@@ -1,28 +1,34 @@
+import uuid
+from collections import Counter
 from datetime import datetime
+from sqlalchemy import delete, insert, text, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from ..extensions import db
-from ..models import Appointment, AppointmentEvent
-import json
-from app.utils.appointments_fields import pack_fields, unpack_fields
+from ..models import Appointment, AppointmentEvent, User
+from .conflict_service import ConflictService, ScheduleConflict
+from .stats_service import StatsService
+from .change_feed import ChangeFeed
+from app.utils.pagination import DEFAULT_LIMIT, decode_cursor, encode_cursor
 
 class AppointmentsService:
 
     @staticmethod
     def request_appointment(payload: dict) -> Appointment:
+        # id generado del lado de Python: el evento puede referenciarlo sin
+        # un flush previo y ambos INSERT salen en el único flush del commit
         appt = Appointment(
+            id=uuid.uuid4(),
             user_id=payload["user_id"],
-            comment=pack_fields(
-                payload["description"],
-                payload.get("comment"),
-                payload.get("considerations")
-            ),
+            description=payload["description"] or "",
+            comment=payload.get("comment"),
+            considerations=payload.get("considerations"),
             requested_start=payload.get("requested_start"),
             requested_end=payload.get("requested_end"),
             status="requested",
         )
 
         db.session.add(appt)
-        db.session.flush()  # asegura appt.id
-
         db.session.add(
             AppointmentEvent(
                 appointment_id=appt.id,
@@ -30,14 +36,23 @@ class AppointmentsService:
                 note="Appointment requested by patient",
             )
         )
+        StatsService.apply(StatsService.delta(None, ("requested", False, None)))
 
         db.session.commit()
+        ChangeFeed.publish_local("appointments", "INSERT", [appt.id])
         return appt
 
     @staticmethod
     def admin_confirm(appointment_id, scheduled_start, scheduled_end) -> Appointment:
         appt = Appointment.query.get_or_404(appointment_id)
 
+        # antes de escribir: el EXCLUDE de Postgres queda como última defensa
+        ConflictService.check(
+            appt.id, scheduled_start, scheduled_end,
+            exclude_appointment_ids={appt.id},
+        )
+
+        before = (appt.status, appt.is_paid, appt.paid_at)
         old_status = appt.status
         appt.status = "confirmed"
         appt.scheduled_start = scheduled_start
@@ -53,13 +68,23 @@ class AppointmentsService:
                 note="Confirmed by therapist/admin",
             )
         )
+        StatsService.apply(StatsService.delta(before, (appt.status, appt.is_paid, appt.paid_at)))
 
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            # otra confirmación ganó la carrera entre el chequeo y el commit
+            if ConflictService.is_overlap_violation(e):
+                raise ScheduleConflict([])
+            raise
+        ChangeFeed.publish_local("appointments", "UPDATE", [appointment_id])
         return appt
 
     @staticmethod
     def mark_paid(appointment_id) -> Appointment:
         appt = Appointment.query.get_or_404(appointment_id)
+        before = (appt.status, appt.is_paid, appt.paid_at)
 
         appt.is_paid = True
         appt.paid_at = datetime.utcnow()
@@ -74,47 +99,448 @@ class AppointmentsService:
                 note="Marked as paid manually by therapist/admin",
             )
         )
+        StatsService.apply(StatsService.delta(before, (appt.status, appt.is_paid, appt.paid_at)))
 
         db.session.commit()
+        ChangeFeed.publish_local("appointments", "UPDATE", [appointment_id])
         return appt
 
     @staticmethod
-    def list_appointments(status=None, user_id=None):
-        q = Appointment.query
-
+    def _apply_filters(
+        q,
+        status=None,
+        user_id=None,
+        is_paid=None,
+        scheduled_from=None,
+        scheduled_to=None,
+        requested_from=None,
+        requested_to=None,
+        created_from=None,
+        created_to=None,
+    ):
+        """Filtros comunes del listado y del export (rangos semiabiertos [from, to))."""
         if status:
-            q = q.filter(Appointment.status == status)
+            statuses = [status] if isinstance(status, str) else list(status)
+            if len(statuses) == 1:
+                q = q.filter(Appointment.status == statuses[0])
+            else:
+                q = q.filter(Appointment.status.in_(statuses))
 
         if user_id:
             q = q.filter(Appointment.user_id == user_id)
 
-        return q.order_by(Appointment.created_at.desc()).all()
-    
+        if is_paid is not None:
+            q = q.filter(Appointment.is_paid.is_(is_paid))
+
+        if scheduled_from:
+            q = q.filter(Appointment.scheduled_start >= scheduled_from)
+        if scheduled_to:
+            q = q.filter(Appointment.scheduled_start < scheduled_to)
+        if requested_from:
+            q = q.filter(Appointment.requested_start >= requested_from)
+        if requested_to:
+            q = q.filter(Appointment.requested_start < requested_to)
+
+        if created_from:
+            q = q.filter(Appointment.created_at >= created_from)
+        if created_to:
+            q = q.filter(Appointment.created_at < created_to)
+
+        return q
+
+    @staticmethod
+    def list_appointments(
+        status=None,
+        user_id=None,
+        limit: int = DEFAULT_LIMIT,
+        cursor: str | None = None,
+        is_paid: bool | None = None,
+        scheduled_from=None,
+        scheduled_to=None,
+        requested_from=None,
+        requested_to=None,
+    ):
+        """
+        Página de citas ordenada por (created_at, id) descendente.
+        status puede ser un string o una lista de estados.
+        Retorna (items, next_cursor); next_cursor es None en la última página.
+        """
+        # to_dict() lee user.full_name: traer el usuario en el mismo SELECT
+        # (many-to-one, no multiplica filas) y solo las columnas necesarias.
+        # Sin esto cada fila dispara su propio SELECT ... FROM users (N+1).
+        q = Appointment.query.options(
+            joinedload(Appointment.user).load_only(User.id, User.full_name)
+        )
+
+        q = AppointmentsService._apply_filters(
+            q, status=status, user_id=user_id, is_paid=is_paid,
+            scheduled_from=scheduled_from, scheduled_to=scheduled_to,
+            requested_from=requested_from, requested_to=requested_to,
+        )
+
+        if cursor:
+            c_created_at, c_id = decode_cursor(cursor)
+            q = q.filter(
+                tuple_(Appointment.created_at, Appointment.id) < tuple_(c_created_at, c_id)
+            )
+
+        # limit + 1: si vuelve una fila extra hay otra página
+        rows = (
+            q.order_by(Appointment.created_at.desc(), Appointment.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return rows, next_cursor
+
+    # columnas del export contable (sin notas clínicas: comment/considerations)
+    EXPORT_COLUMNS = (
+        "id", "user_id", "full_name", "status", "description",
+        "requested_start", "requested_end", "scheduled_start", "scheduled_end",
+        "is_paid", "paid_at", "created_at", "updated_at",
+    )
+
+    @staticmethod
+    def export_rows(batch_size: int = 1000, **filters):
+        """
+        Generador de tuplas (en el orden de EXPORT_COLUMNS) ordenadas por
+        (created_at, id). Filtros: los de _apply_filters.
+
+        stream_results + yield_per: psycopg2 usa un cursor con nombre del
+        lado del servidor y trae batch_size filas por vez, así la memoria
+        del worker no depende del tamaño del export. Sin objetos ORM: solo
+        tuplas de columnas.
+        """
+        q = db.session.query(
+            Appointment.id, Appointment.user_id, User.full_name,
+            Appointment.status, Appointment.description,
+            Appointment.requested_start, Appointment.requested_end,
+            Appointment.scheduled_start, Appointment.scheduled_end,
+            Appointment.is_paid, Appointment.paid_at,
+            Appointment.created_at, Appointment.updated_at,
+        ).join(User, User.id == Appointment.user_id)
+
+        q = AppointmentsService._apply_filters(q, **filters)
+        q = q.order_by(Appointment.created_at.asc(), Appointment.id.asc())
+
+        yield from q.execution_options(stream_results=True, yield_per=batch_size)
+
+    @staticmethod
+    def list_events(
+        appointment_id=None,
+        event_type=None,
+        created_from=None,
+        created_to=None,
+        limit: int = DEFAULT_LIMIT,
+        cursor: str | None = None,
+    ):
+        """
+        Historial de eventos ordenado por (created_at, id) descendente, de una
+        cita o global (feed de auditoría). Retorna (items, next_cursor).
+        """
+        q = AppointmentEvent.query
+
+        if appointment_id:
+            q = q.filter(AppointmentEvent.appointment_id == appointment_id)
+        if event_type:
+            q = q.filter(AppointmentEvent.event_type == event_type)
+
+        # rango semiabierto [from, to); además poda particiones en Postgres
+        if created_from:
+            q = q.filter(AppointmentEvent.created_at >= created_from)
+        if created_to:
+            q = q.filter(AppointmentEvent.created_at < created_to)
+
+        if cursor:
+            c_created_at, c_id = decode_cursor(cursor)
+            q = q.filter(
+                tuple_(AppointmentEvent.created_at, AppointmentEvent.id) < tuple_(c_created_at, c_id)
+            )
+
+        rows = (
+            q.order_by(AppointmentEvent.created_at.desc(), AppointmentEvent.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return rows, next_cursor
+
+    @staticmethod
+    def ensure_event_partitions(months_ahead: int = 3) -> None:
+        """Crea las particiones mensuales de appointment_events (mes actual + months_ahead)."""
+        db.session.execute(
+            text("SELECT appointment_events_ensure_partitions(current_date, :n)"),
+            {"n": months_ahead + 1},
+        )
+        db.session.commit()
+
+    @staticmethod
+    def archive_events(keep_months: int) -> list:
+        """Desengancha las particiones de eventos más viejas que keep_months meses."""
+        rows = db.session.execute(
+            text("SELECT appointment_events_archive(:k)"), {"k": keep_months}
+        ).scalars().all()
+        db.session.commit()
+        return rows
+
+    @staticmethod
+    def owner_id(appointment_id):
+        """user_id de la cita (o None si no existe), sin cargar la fila entera."""
+        return db.session.query(Appointment.user_id).filter(
+            Appointment.id == appointment_id
+        ).scalar()
+
     @staticmethod
     def admin_update(appointment_id, payload: dict) -> Appointment:
         appt = Appointment.query.get_or_404(appointment_id)
-
-        fields = unpack_fields(appt.comment)
+        before = (appt.status, appt.is_paid, appt.paid_at)
 
         if "description" in payload:
-            fields["description"] = payload.get("description") or ""
+            appt.description = payload.get("description") or ""
         if "comment" in payload:
-            fields["comment"] = payload.get("comment")
+            appt.comment = payload.get("comment")
         if "considerations" in payload:
-            fields["considerations"] = payload.get("considerations")
-
-        appt.comment = pack_fields(fields["description"], fields["comment"], fields["considerations"])
+            appt.considerations = payload.get("considerations")
 
         for k in ["requested_start","requested_end","scheduled_start","scheduled_end"]:
             if k in payload:
                 setattr(appt, k, payload[k])
 
         appt.updated_at = datetime.utcnow()
+        # hoy no cambia estado ni pago (delta vacío); queda por si el payload crece
+        StatsService.apply(StatsService.delta(before, (appt.status, appt.is_paid, appt.paid_at)))
         db.session.commit()
+        ChangeFeed.publish_local("appointments", "UPDATE", [appointment_id])
         return appt
     
     @staticmethod
     def delete_appointment(appointment_id) -> None:
         appt = Appointment.query.get_or_404(appointment_id)
+        StatsService.apply(StatsService.delta((appt.status, appt.is_paid, appt.paid_at), None))
         db.session.delete(appt)
         db.session.commit()
+        ChangeFeed.publish_local("appointments", "DELETE", [appointment_id])
+
+    # -----------------------------
+    # Operaciones en lote (admin)
+    # -----------------------------
+    @staticmethod
+    def _parse_ids(raw_ids) -> tuple[list, dict]:
+        """
+        Retorna (ids_validos_sin_repetir, errores_por_posicion).
+        """
+        ids, seen, errors = [], set(), {}
+        for pos, raw in enumerate(raw_ids):
+            try:
+                appt_id = raw if isinstance(raw, uuid.UUID) else uuid.UUID(str(raw))
+            except (ValueError, TypeError, AttributeError):
+                errors[pos] = "invalid_id"
+                continue
+            if appt_id in seen:
+                errors[pos] = "duplicated"
+                continue
+            seen.add(appt_id)
+            ids.append(appt_id)
+        return ids, errors
+
+    @staticmethod
+    def _load_states(ids) -> dict:
+        # una sola consulta, solo las columnas que hacen falta
+        if not ids:
+            return {}
+        rows = db.session.query(
+            Appointment.id, Appointment.status, Appointment.is_paid, Appointment.paid_at
+        ).filter(Appointment.id.in_(ids)).all()
+        return {r.id: r for r in rows}
+
+    @staticmethod
+    def _results(raw_ids, errors: dict, ok: dict) -> list:
+        results = []
+        for pos, raw in enumerate(raw_ids):
+            if pos in errors:
+                results.append({"id": str(raw), "ok": False, "error": errors[pos]})
+            else:
+                results.append({"id": str(raw), "ok": True, **ok.get(pos, {})})
+        return results
+
+    @staticmethod
+    def bulk_confirm(items: list) -> list:
+        """
+        items: [{"id", "scheduled_start", "scheduled_end"}] (datetimes ya
+        parseados). Un SELECT, un UPDATE por lote (executemany por PK),
+        un INSERT por lote de eventos y un solo commit.
+        """
+        raw_ids = [it.get("id") for it in items]
+        ids, errors = AppointmentsService._parse_ids(raw_ids)
+        states = AppointmentsService._load_states(ids)
+
+        now = datetime.utcnow()
+        updates, events, ok = [], [], {}
+        stats = Counter()
+        for pos, it in enumerate(items):
+            if pos in errors:
+                continue
+            appt_id = uuid.UUID(str(it["id"]))
+            state = states.get(appt_id)
+            if state is None:
+                errors[pos] = "not_found"
+                continue
+
+            start, end = it.get("scheduled_start"), it.get("scheduled_end")
+            if not start or not end:
+                errors[pos] = "scheduled_start and scheduled_end are required"
+                continue
+            if end <= start:
+                errors[pos] = "scheduled_end must be greater than scheduled_start"
+                continue
+
+            updates.append({
+                "id": appt_id,
+                "status": "confirmed",
+                "scheduled_start": start,
+                "scheduled_end": end,
+                "updated_at": now,
+            })
+            events.append({
+                "appointment_id": appt_id,
+                "event_type": "status_changed",
+                "old_value": state.status,
+                "new_value": "confirmed",
+                "note": "Confirmed by therapist/admin (bulk)",
+            })
+            ok[pos] = {"status": "confirmed"}
+            stats.update(StatsService.delta(
+                (state.status, state.is_paid, state.paid_at),
+                ("confirmed", state.is_paid, state.paid_at),
+            ))
+
+        # el lote se aplica entero o no se aplica: con un conflicto no se escribe nada
+        conflicts = ConflictService.find_conflicts(
+            [(u["id"], u["scheduled_start"], u["scheduled_end"]) for u in updates],
+            exclude_appointment_ids={u["id"] for u in updates},
+        )
+        if conflicts:
+            raise ScheduleConflict([
+                {"id": str(appt_id), "conflicts": found}
+                for appt_id, found in conflicts.items()
+            ])
+
+        if updates:
+            try:
+                db.session.execute(update(Appointment), updates)
+                db.session.execute(insert(AppointmentEvent), events)
+                StatsService.apply(stats)
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                if ConflictService.is_overlap_violation(e):
+                    raise ScheduleConflict([])
+                raise
+            except Exception:
+                db.session.rollback()
+                raise
+            ChangeFeed.publish_local("appointments", "UPDATE", [u["id"] for u in updates])
+
+        return AppointmentsService._results(raw_ids, errors, ok)
+
+    @staticmethod
+    def bulk_mark_paid(raw_ids: list) -> list:
+        ids, errors = AppointmentsService._parse_ids(raw_ids)
+        states = AppointmentsService._load_states(ids)
+
+        now = datetime.utcnow()
+        to_pay, ok = [], {}
+        stats = Counter()
+        for pos, raw in enumerate(raw_ids):
+            if pos in errors:
+                continue
+            appt_id = uuid.UUID(str(raw))
+            state = states.get(appt_id)
+            if state is None:
+                errors[pos] = "not_found"
+            elif state.is_paid:
+                # no pisar el paid_at original
+                ok[pos] = {"is_paid": True, "unchanged": True}
+            else:
+                to_pay.append(appt_id)
+                ok[pos] = {"is_paid": True}
+                stats.update(StatsService.delta(
+                    (state.status, False, None), (state.status, True, now)
+                ))
+
+        if to_pay:
+            try:
+                db.session.execute(
+                    update(Appointment)
+                    .where(Appointment.id.in_(to_pay))
+                    .values(is_paid=True, paid_at=now, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.execute(insert(AppointmentEvent), [
+                    {
+                        "appointment_id": appt_id,
+                        "event_type": "payment_marked",
+                        "old_value": "unpaid",
+                        "new_value": "paid",
+                        "note": "Marked as paid manually by therapist/admin (bulk)",
+                    }
+                    for appt_id in to_pay
+                ])
+                StatsService.apply(stats)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            ChangeFeed.publish_local("appointments", "UPDATE", to_pay)
+
+        return AppointmentsService._results(raw_ids, errors, ok)
+
+    @staticmethod
+    def bulk_delete(raw_ids: list) -> list:
+        ids, errors = AppointmentsService._parse_ids(raw_ids)
+        states = AppointmentsService._load_states(ids)
+
+        to_delete, ok = [], {}
+        stats = Counter()
+        for pos, raw in enumerate(raw_ids):
+            if pos in errors:
+                continue
+            appt_id = uuid.UUID(str(raw))
+            state = states.get(appt_id)
+            if state is None:
+                errors[pos] = "not_found"
+            else:
+                to_delete.append(appt_id)
+                ok[pos] = {"deleted": True}
+                stats.update(StatsService.delta(
+                    (state.status, state.is_paid, state.paid_at), None
+                ))
+
+        if to_delete:
+            try:
+                # appointment_events se borra por ON DELETE CASCADE
+                db.session.execute(
+                    delete(Appointment)
+                    .where(Appointment.id.in_(to_delete))
+                    .execution_options(synchronize_session=False)
+                )
+                StatsService.apply(stats)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            ChangeFeed.publish_local("appointments", "DELETE", to_delete)
+
+        return AppointmentsService._results(raw_ids, errors, ok)
@@ -22,8 +22,7 @@ class AuthService:
 
         password_hash = generate_password_hash(password)
 
-        conn = get_connection()
-        try:
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 # Verificar si existe
                 cur.execute("SELECT id FROM users WHERE email = %s;", (email,))
@@ -41,8 +40,6 @@ class AuthService:
                 user = cur.fetchone()
                 conn.commit()
                 return user
-        finally:
-            conn.close()
 
     @staticmethod
     def authenticate(email: str, password: str) -> dict:
@@ -51,8 +48,7 @@ class AuthService:
 
         email = email.strip().lower()
 
-        conn = get_connection()
-        try:
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute(
                     """
@@ -76,16 +72,13 @@ class AuthService:
                 # Nunca devolvemos el hash hacia afuera
                 user.pop("password_hash", None)
                 return user
-        finally:
-            conn.close()
     
     @staticmethod
     def get_user_by_id(user_id: str) -> dict | None:
         from psycopg2.extras import RealDictCursor
         from app.db import get_connection
 
-        conn = get_connection()
-        try:
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
                     SELECT id, full_name, email, role, is_active, created_at, updated_at
@@ -93,8 +86,6 @@ class AuthService:
                     WHERE id = %s;
                 """, (user_id,))
                 return cur.fetchone()
-        finally:
-            conn.close()
 
     @staticmethod
     def update_profile(user_id: str, full_name: str, email: str) -> dict:
@@ -106,8 +97,7 @@ class AuthService:
         if not email:
             raise ValueError("email es requerido")
 
-        conn = get_connection()
-        try:
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 # Verificar que exista el usuario
                 cur.execute("SELECT id FROM users WHERE id = %s;", (user_id,))
@@ -136,8 +126,6 @@ class AuthService:
                 user = cur.fetchone()
                 conn.commit()
                 return user
-        finally:
-            conn.close()
 
     @staticmethod
     def change_password(user_id: str, current_password: str, new_password: str) -> None:
@@ -147,8 +135,7 @@ class AuthService:
         if len(new_password) < 6:
             raise ValueError("La nueva contraseña debe tener al menos 6 caracteres")
 
-        conn = get_connection()
-        try:
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute(
                     "SELECT password_hash, is_active FROM users WHERE id = %s;",
@@ -176,8 +163,6 @@ class AuthService:
                     (new_hash, user_id),
                 )
                 conn.commit()
-        finally:
-            conn.close()
 
     @staticmethod
     def _hash_reset_token(raw_token: str) -> str:
@@ -191,8 +176,7 @@ class AuthService:
 
         email = email.strip().lower()
 
-        conn = get_connection()
-        try:
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute(
                     "SELECT id, email, full_name, is_active FROM users WHERE email = %s;",
@@ -249,9 +233,6 @@ class AuthService:
 
                 send_email(to_email=email, subject=subject, html_body=html, text_body=text)
 
-        finally:
-            conn.close()
-
     @staticmethod
     def reset_password(email: str, token: str, new_password: str) -> None:
         if not email or not token or not new_password:
@@ -264,8 +245,7 @@ class AuthService:
 
         token_hash = AuthService._hash_reset_token(token)
 
-        conn = get_connection()
-        try:
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute(
                     """
@@ -308,6 +288,4 @@ class AuthService:
                     """,
                     (new_hash, str(user["id"])),
                 )
-                conn.commit()
-        finally:
-            conn.close()
\ No newline at end of file
+                conn.commit()
\ No newline at end of file
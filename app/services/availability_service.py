@@ -0,0 +1,146 @@
+# app/services/availability_service.py
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from ..extensions import db
+from ..models import Appointment, PlannerItem, TherapistTimeOff, TherapistWeeklyAvailability
+from .conflict_service import BLOCKING_PLANNER_KINDS, BUSY_STATUSES
+from app.utils.intervals import from_minutes, subtract, slots, to_minutes
+from app.utils.ttl_cache import TTLCache
+
+MAX_RANGE_DAYS = int(os.getenv("AVAILABILITY_MAX_RANGE_DAYS", "92"))
+
+
+class AvailabilityService:
+    # la agenda semanal (TIME sin zona) se interpreta en la zona de la clínica
+    TZ = ZoneInfo(os.getenv("CLINIC_TIMEZONE", "UTC"))
+
+    # la plantilla semanal casi no cambia: se cachea por worker
+    _rules_cache = TTLCache(
+        maxsize=1, ttl=float(os.getenv("AVAILABILITY_RULES_TTL_SECONDS", "60"))
+    )
+
+    @staticmethod
+    def _weekly_rules() -> tuple:
+        """
+        Plantilla semanal compacta: 7 tuplas (lunes=1 ... domingo=7, índice
+        day_of_week - 1) de intervalos (minuto_inicio, minuto_fin) del día.
+        """
+        rules = AvailabilityService._rules_cache.get("weekly")
+        if rules is not None:
+            return rules
+
+        days = [[] for _ in range(7)]
+        rows = db.session.query(
+            TherapistWeeklyAvailability.day_of_week,
+            TherapistWeeklyAvailability.start_time,
+            TherapistWeeklyAvailability.end_time,
+        ).filter(TherapistWeeklyAvailability.is_active.is_(True)).all()
+
+        for dow, start, end in rows:
+            days[dow - 1].append((
+                start.hour * 60 + start.minute,
+                end.hour * 60 + end.minute,
+            ))
+
+        rules = tuple(tuple(sorted(d)) for d in days)
+        AvailabilityService._rules_cache.set("weekly", rules)
+        return rules
+
+    @staticmethod
+    def invalidate_rules() -> None:
+        AvailabilityService._rules_cache.clear()
+
+    @staticmethod
+    def _open_intervals(date_from: datetime, date_to: datetime) -> list:
+        """Expande la plantilla semanal a intervalos absolutos dentro del rango."""
+        tz = AvailabilityService.TZ
+        rules = AvailabilityService._weekly_rules()
+        lo, hi = to_minutes(date_from), to_minutes(date_to)
+
+        out = []
+        day = date_from.astimezone(tz).date()
+        last = date_to.astimezone(tz).date()
+        while day <= last:
+            for start_min, end_min in rules[day.isoweekday() - 1]:
+                midnight = datetime(day.year, day.month, day.day, tzinfo=tz)
+                # se suma sobre la hora local y luego se convierte: respeta DST
+                s = to_minutes(midnight + timedelta(minutes=start_min))
+                e = to_minutes(midnight + timedelta(minutes=end_min))
+                s, e = max(s, lo), min(e, hi)
+                if e > s:
+                    out.append((s, e))
+            day += timedelta(days=1)
+        return out
+
+    @staticmethod
+    def _busy_intervals(date_from: datetime, date_to: datetime) -> list:
+        """Citas confirmadas/completadas, bloqueos e items bloqueantes del planner que intersectan [from, to)."""
+        appts = db.session.query(
+            Appointment.scheduled_start, Appointment.scheduled_end
+        ).filter(
+            Appointment.status.in_(BUSY_STATUSES),
+            Appointment.scheduled_start < date_to,
+            Appointment.scheduled_end > date_from,
+        )
+
+        time_off = db.session.query(
+            TherapistTimeOff.start_at, TherapistTimeOff.end_at
+        ).filter(
+            TherapistTimeOff.start_at < date_to,
+            TherapistTimeOff.end_at > date_from,
+        )
+
+        planner = db.session.query(
+            PlannerItem.start_at, PlannerItem.end_at
+        ).filter(
+            PlannerItem.kind.in_(BLOCKING_PLANNER_KINDS),
+            PlannerItem.start_at < date_to,
+            PlannerItem.end_at > date_from,
+        )
+
+        out = []
+        for q in (appts, time_off, planner):
+            for s, e in q.all():
+                # minutos parciales cuentan como ocupados: fin redondeado hacia arriba
+                out.append((to_minutes(s), to_minutes(e, ceil=True)))
+        return out
+
+    @staticmethod
+    def find_free(date_from: datetime, date_to: datetime, duration: int, step: int | None = None) -> dict:
+        """
+        Huecos libres en [date_from, date_to) para citas de `duration`
+        minutos. Retorna {"free": [...], "slots": [...]} con pares ISO.
+        """
+        if date_from.tzinfo is None or date_to.tzinfo is None:
+            raise ValueError("from and to must include a timezone")
+        if date_to <= date_from:
+            raise ValueError("to must be greater than from")
+        if date_to - date_from > timedelta(days=MAX_RANGE_DAYS):
+            raise ValueError(f"range must be at most {MAX_RANGE_DAYS} days")
+        if duration <= 0:
+            raise ValueError("duration must be a positive number of minutes")
+        step = step or duration
+        if step <= 0:
+            raise ValueError("step must be a positive number of minutes")
+
+        free = subtract(
+            AvailabilityService._open_intervals(date_from, date_to),
+            AvailabilityService._busy_intervals(date_from, date_to),
+        )
+
+        def iso(pairs):
+            return [
+                {"start": from_minutes(s).isoformat(), "end": from_minutes(e).isoformat()}
+                for s, e in pairs
+            ]
+
+        return {
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat(),
+            "duration": duration,
+            "step": step,
+            "free": iso(free),
+            "slots": iso(slots(free, duration, step)),
+        }
@@ -0,0 +1,216 @@
+# app/services/change_feed.py
+"""
+Feed de cambios de citas e items del planner para los clientes SSE.
+
+Backends (CHANGE_FEED_BACKEND):
+  postgres - (default) triggers por fila hacen pg_notify('app_changes', ...)
+             y cada worker tiene UN hilo con LISTEN que reparte los avisos
+             a sus clientes. Funciona con varios workers y nodos.
+  local    - pub/sub en memoria: los servicios publican después del commit.
+             Solo sirve con un único worker (los demás no se enteran).
+
+Cada worker guarda los últimos CHANGE_FEED_HISTORY eventos en orden de
+llegada para reanudar desde Last-Event-ID. Cada cliente tiene una cola
+acotada (SSE_CLIENT_QUEUE): si se llena, el cliente lento se desconecta y
+EventSource reconecta y se pone al día desde el historial, sin que el
+worker acumule memoria por él.
+"""
+import itertools
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "app_changes"
+BACKEND = os.getenv("CHANGE_FEED_BACKEND", "postgres")
+HISTORY_SIZE = int(os.getenv("CHANGE_FEED_HISTORY", "1000"))
+CLIENT_QUEUE_SIZE = int(os.getenv("SSE_CLIENT_QUEUE", "256"))
+# clientes SSE simultáneos por worker: 0 deshabilita el stream, negativo es
+# sin límite. gunicorn.conf.py lo fija según el perfil para que los streams
+# no ocupen todos los hilos del worker.
+MAX_SUBSCRIBERS = int(os.getenv("SSE_MAX_STREAMS", "-1"))
+
+# evento especial: se perdieron avisos, el cliente debe recargar los listados
+RESET = {"type": "reset"}
+
+
+class TooManySubscribers(Exception):
+    """El worker ya tiene MAX_SUBSCRIBERS clientes SSE abiertos."""
+
+
+class Subscription:
+    def __init__(self, maxsize: int):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class ChangeFeed:
+    _lock = threading.Lock()
+    _history = deque(maxlen=HISTORY_SIZE)  # eventos {"id", "table", "op", "row_id"}
+    _subscribers = set()
+    _listener = None
+    _listener_pid = None
+    _local_ids = itertools.count(1)
+
+    # -----------------------------
+    # Suscripción
+    # -----------------------------
+    @classmethod
+    def subscribe(cls, last_event_id: str | None = None, engine=None):
+        """
+        Retorna (subscription, backlog). backlog son los eventos posteriores
+        a last_event_id, o [RESET] si ese id ya no está en el historial.
+        Se registra bajo el mismo lock que el replay: no se pierde nada
+        entre el backlog y los eventos en vivo. Lanza TooManySubscribers
+        si el worker ya está en MAX_SUBSCRIBERS.
+        """
+        cls._ensure_listener(engine)
+        sub = Subscription(CLIENT_QUEUE_SIZE)
+        with cls._lock:
+            if 0 <= MAX_SUBSCRIBERS <= len(cls._subscribers):
+                raise TooManySubscribers()
+            backlog = cls._replay(last_event_id)
+            cls._subscribers.add(sub)
+        return sub, backlog
+
+    @classmethod
+    def unsubscribe(cls, sub: Subscription) -> None:
+        with cls._lock:
+            cls._subscribers.discard(sub)
+
+    @classmethod
+    def _replay(cls, last_event_id):
+        if not last_event_id:
+            return []
+        # por orden de llegada (no por id: con varios escritores los ids
+        # de la secuencia no llegan ordenados)
+        for pos, event in enumerate(cls._history):
+            if event["id"] == last_event_id:
+                return list(itertools.islice(cls._history, pos + 1, None))
+        return [RESET]
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "backend": BACKEND,
+                "subscribers": len(cls._subscribers),
+                "max_subscribers": MAX_SUBSCRIBERS,
+                "history": len(cls._history),
+                "listener_alive": bool(cls._listener and cls._listener.is_alive()),
+            }
+
+    # -----------------------------
+    # Publicación
+    # -----------------------------
+    @classmethod
+    def _publish(cls, event: dict) -> None:
+        with cls._lock:
+            if event is RESET:
+                # hubo un hueco: ids anteriores ya no sirven para reanudar
+                cls._history.clear()
+            else:
+                cls._history.append(event)
+            subscribers = list(cls._subscribers)
+
+        for sub in subscribers:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # backpressure: no bufferear sin límite para un cliente lento
+                sub.overflowed = True
+                cls.unsubscribe(sub)
+
+    @classmethod
+    def publish_local(cls, table: str, op: str, row_ids) -> None:
+        """Backend local: llamar DESPUÉS del commit. Con postgres no hace nada (lo hace el trigger)."""
+        if BACKEND != "local":
+            return
+        for row_id in row_ids:
+            cls._publish({
+                "id": str(next(cls._local_ids)),
+                "table": table,
+                "op": op,
+                "row_id": str(row_id),
+            })
+
+    # -----------------------------
+    # LISTEN (backend postgres)
+    # -----------------------------
+    @classmethod
+    def _ensure_listener(cls, engine) -> None:
+        if BACKEND != "postgres" or engine is None:
+            return
+        with cls._lock:
+            # los hilos no sobreviven al fork: uno por worker, arrancado en el worker
+            alive = cls._listener is not None and cls._listener.is_alive()
+            if alive and cls._listener_pid == os.getpid():
+                return
+            cls._listener_pid = os.getpid()
+            cls._listener = threading.Thread(
+                target=cls._listen_forever, args=(engine,),
+                name="change-feed-listener", daemon=True,
+            )
+            cls._listener.start()
+
+    @classmethod
+    def _listen_forever(cls, engine) -> None:
+        backoff = 1.0
+        first = True
+        while True:
+            conn = None
+            try:
+                # conexión propia, fuera del pool: LISTEN la ocupa para siempre
+                proxied = engine.raw_connection()
+                proxied.detach()
+                conn = proxied.dbapi_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL};")
+
+                if not first:
+                    # mientras no había conexión se pudieron perder avisos
+                    cls._publish(RESET)
+                first = False
+                backoff = 1.0
+
+                while True:
+                    readable, _, _ = select.select([conn], [], [], 30)
+                    if not readable:
+                        # sin tráfico: verificar que la conexión siga viva
+                        with conn.cursor() as cur:
+                            cur.execute("SELECT 1;")
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        cls._on_notify(conn.notifies.pop(0).payload)
+            except Exception:
+                log.exception("change feed: LISTEN caído, reintentando en %.0fs", backoff)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    @classmethod
+    def _on_notify(cls, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            event = {
+                "id": str(data["id"]),
+                "table": data["table"],
+                "op": data["op"],
+                "row_id": str(data["row_id"]),
+            }
+        except (ValueError, KeyError, TypeError):
+            log.warning("change feed: payload inválido %r", payload)
+            return
+        cls._publish(event)
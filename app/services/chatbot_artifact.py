@@ -0,0 +1,145 @@
+# app/services/chatbot_artifact.py
+"""
+Artefacto binario del modelo del chatbot.
+
+Formato (un solo archivo, así se publica con un os.replace atómico):
+
+    MAGIC (8 bytes) | largo del header (uint64 LE) | header JSON utf-8 |
+    padding | arrays crudos alineados a 64 bytes
+
+El header guarda vocabulario, tablas de respuestas/tags/patrones, el
+sha256 del intents.json de origen y la posición de cada array (idf y la
+matriz CSR: data, indices, indptr). Los arrays se abren con np.memmap en
+modo lectura: todos los workers comparten las mismas páginas físicas
+desde el page cache del sistema operativo.
+
+numpy se importa dentro de cada función para no cargarlo al importar la
+app (ver ChatbotService.warm_up).
+"""
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+MAGIC = b"FRHCBOT1"
+FORMAT_VERSION = 1
+_ALIGN = 64
+
+
+def source_sha256(path: Path) -> str | None:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+def write_artifact(
+    path: Path,
+    *,
+    source_sha: str | None,
+    params: Dict[str, Any],
+    vocabulary: List[str],
+    idf,
+    matriz,
+    patrones: List[str],
+    respuestas: List[str],
+    tags: List[str],
+) -> None:
+    import numpy as np
+
+    arrays = {
+        "idf": np.ascontiguousarray(idf, dtype=np.float64),
+        "data": np.ascontiguousarray(matriz.data, dtype=np.float64),
+        "indices": np.ascontiguousarray(matriz.indices, dtype=np.int32),
+        "indptr": np.ascontiguousarray(matriz.indptr, dtype=np.int32),
+    }
+
+    header: Dict[str, Any] = {
+        "format": FORMAT_VERSION,
+        "source_sha256": source_sha,
+        "params": params,
+        "shape": list(matriz.shape),
+        "vocabulary": vocabulary,
+        "patrones": patrones,
+        "respuestas": respuestas,
+        "tags": tags,
+        "arrays": {},
+    }
+
+    # los offsets dependen del largo del header, que a su vez contiene los
+    # offsets: se calculan relativos al inicio de la zona de arrays
+    rel = 0
+    for name, arr in arrays.items():
+        header["arrays"][name] = {"offset": rel, "dtype": arr.dtype.str, "length": int(arr.size)}
+        rel += arr.nbytes + _pad(arr.nbytes)
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix = len(MAGIC) + 8 + len(header_bytes)
+    base = prefix + _pad(prefix)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b"\0" * (base - prefix))
+            for arr in arrays.values():
+                f.write(arr.tobytes())
+                f.write(b"\0" * _pad(arr.nbytes))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_artifact(path: Path) -> Dict[str, Any]:
+    """
+    Lee el header y abre los arrays con memmap (solo lectura).
+    Lanza ValueError si el archivo no es un artefacto válido.
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("chatbot artifact: magic inválido")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError("chatbot artifact: formato no soportado")
+
+    prefix = len(MAGIC) + 8 + header_len
+    base = prefix + _pad(prefix)
+
+    arrays = {}
+    for name, desc in header["arrays"].items():
+        if desc["length"] == 0:
+            arrays[name] = np.empty(0, dtype=np.dtype(desc["dtype"]))
+            continue
+        arrays[name] = np.memmap(
+            path,
+            dtype=np.dtype(desc["dtype"]),
+            mode="r",
+            offset=base + desc["offset"],
+            shape=(desc["length"],),
+        )
+
+    header["arrays"] = arrays
+    return header
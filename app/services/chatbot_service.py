@@ -1,18 +1,86 @@
 # app/services/chatbot_service.py
 import json
-import re
+import os
+import struct
+import threading
+import time
 import unicodedata
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List, NamedTuple
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from app.services.chatbot_artifact import read_artifact, source_sha256, write_artifact
+from app.utils.ttl_cache import TTLCache
+
+
+class ChatbotModel(NamedTuple):
+    vectorizer: Any                 # TfidfVectorizer ya entrenado
+    matriz: Any                     # CSR (n_patrones x vocab), filas L2
+    respuestas: List[str]
+    tags: List[str]
+    exactos: Dict[str, Tuple[int, float]]  # patrón normalizado -> (fila, score) (tier 1)
+    indice: Dict[str, List[int]]    # token -> filas que lo contienen (tier 2)
+    version: Any                    # (mtime_ns, size) de intents.json
+
+
+class _TablaNormalizacion(dict):
+    """
+    Tabla para str.translate que reproduce, carácter por carácter:
+    NFD -> quitar marcas (Mn) -> todo lo que no sea [a-z0-9] o espacio
+    pasa a " ". ASCII y Latin-1/Latin Extended se precalculan; el resto
+    se resuelve al vuelo sin guardarse (la tabla no crece sin límite).
+    """
+
+    _PERMITIDOS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+
+    def __init__(self):
+        super().__init__()
+        for cp in range(0x250):
+            self[cp] = self._mapear(chr(cp))
+
+    @classmethod
+    def _mapear(cls, c: str) -> str:
+        if c.isspace():
+            return c
+        base = "".join(
+            d for d in unicodedata.normalize("NFD", c)
+            if unicodedata.category(d) != "Mn"
+        )
+        return "".join(d if d in cls._PERMITIDOS else " " for d in base)
+
+    def __missing__(self, cp: int) -> str:
+        return self._mapear(chr(cp))
+
+
+_TABLA = _TablaNormalizacion()
+
+
+@lru_cache(maxsize=4096)
+def _normalizar(texto: str) -> str:
+    # str.split() sin argumentos colapsa el mismo espacio Unicode que \s+
+    return " ".join((texto or "").lower().translate(_TABLA).split())
 
 
 class ChatbotService:
-    _data = None
-    _dataset_cache = None  # (patrones_norm, respuestas, tags)
+    # modelo publicado; se reemplaza entero (nunca se muta) al recargar
+    _model_cache: Optional[ChatbotModel] = None
+    _reload_lock = threading.Lock()
+    _last_check = 0.0
     _intents_path = Path(__file__).parent / "chatbot" / "intents.json"
+    # artefacto compilado (flask chatbot compile); se recompila si quedó viejo
+    _artifact_path = Path(
+        os.getenv("CHATBOT_ARTIFACT_PATH")
+        or Path(__file__).parent / "chatbot" / "intents.bin"
+    )
+
+    # cada cuánto (segundos) revisar el mtime de intents.json
+    RELOAD_CHECK_SECONDS = float(os.getenv("CHATBOT_RELOAD_CHECK_SECONDS", "2"))
+
+    # cache de respuestas: (msg_norm, context, threshold, version) -> reply
+    _reply_cache = TTLCache(
+        maxsize=int(os.getenv("CHATBOT_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("CHATBOT_CACHE_TTL_SECONDS", "300")),
+    )
 
     # --- reglas / config ---
     STOPWORDS_ES = {
@@ -51,40 +119,37 @@ class ChatbotService:
     # -----------------------------
     @staticmethod
     def normalizar(texto: str) -> str:
-        texto = (texto or "").lower().strip()
-        texto = "".join(
-            c for c in unicodedata.normalize("NFD", texto)
-            if unicodedata.category(c) != "Mn"
-        )
-        texto = re.sub(r"[^a-z0-9\s]", " ", texto)
-        texto = re.sub(r"\s+", " ", texto).strip()
-        return texto
+        return _normalizar(texto)
 
     # -----------------------------
     # Cargar intents
     # -----------------------------
     @classmethod
-    def _load_data(cls) -> dict:
-        if cls._data is None:
-            try:
-                with open(cls._intents_path, "r", encoding="utf-8") as f:
-                    cls._data = json.load(f)
-            except FileNotFoundError:
-                cls._data = {"intents": []}
-            except json.JSONDecodeError:
-                cls._data = {"intents": []}
+    def _intents_version(cls):
+        try:
+            st = os.stat(cls._intents_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
 
-        return cls._data
+    @classmethod
+    def _load_data(cls) -> dict:
+        try:
+            with open(cls._intents_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"intents": []}
+        except json.JSONDecodeError:
+            return {"intents": []}
 
     @classmethod
-    def _build_dataset(cls) -> Tuple[list, list, list]:
+    def _build_dataset(cls, data: dict) -> Tuple[list, list, list]:
         """
-        Construye y cachea:
+        Construye:
         - patrones_norm: lista[str]
         - respuestas: lista[str]
         - tags: lista[str]
         """
-        data = cls._load_data()
         intents = data.get("intents", [])
 
         patrones_norm, respuestas, tags = [], [], []
@@ -103,62 +168,390 @@ class ChatbotService:
                     respuestas.append(resp)
                     tags.append(tag)
 
-        cls._dataset_cache = (patrones_norm, respuestas, tags)
         return patrones_norm, respuestas, tags
 
+    # -----------------------------
+    # Modelo TF-IDF precalculado
+    # -----------------------------
+    @classmethod
+    def _tokens(cls, texto_norm: str) -> set:
+        # mismos tokens que ve el vectorizer (\w\w+), sin stopwords
+        return {t for t in texto_norm.split() if len(t) > 1 and t not in cls.STOPWORDS_ES}
+
     @classmethod
-    def _get_dataset(cls) -> Tuple[list, list, list]:
-        # si no está cacheado o quedó vacío, construir
-        if cls._dataset_cache is None:
-            return cls._build_dataset()
+    def _vectorizer_params(cls) -> Dict[str, Any]:
+        # se guardan en el artefacto: si cambian, el artefacto queda viejo
+        return {
+            "ngram_range": [1, 2],
+            "stop_words": sorted(cls.STOPWORDS_ES),
+            "norm": "l2",
+        }
 
-        patrones_norm, respuestas, tags = cls._dataset_cache
+    @classmethod
+    def _new_vectorizer(cls, **kwargs):
+        # import diferido: sklearn/scipy solo se cargan con el primer uso
+        # del chatbot (o en warm_up), no al importar la app
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        params = cls._vectorizer_params()
+        return TfidfVectorizer(
+            ngram_range=tuple(params["ngram_range"]),
+            stop_words=params["stop_words"],
+            norm=params["norm"],
+            **kwargs,
+        )
+
+    @classmethod
+    def compile_artifact(cls, path: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        Compila intents.json al artefacto binario (ver chatbot_artifact):
+        vocabulario, IDF, matriz CSR y tablas de respuestas/tags.
+        Retorna un resumen; lanza ValueError si intents.json no se puede
+        leer o no hay vocabulario.
+        """
+        path = Path(path or cls._artifact_path)
+        sha = source_sha256(cls._intents_path)
+        if sha is None:
+            raise ValueError(f"no se pudo leer {cls._intents_path}")
+        patrones_norm, respuestas, tags = cls._build_dataset(cls._load_data())
         if not patrones_norm:
-            return cls._build_dataset()
+            # _load_data trata el JSON inválido como vacío
+            raise ValueError(f"{cls._intents_path} no tiene patrones (¿JSON inválido o vacío?)")
+
+        vectorizer = cls._new_vectorizer()
+        matriz = vectorizer.fit_transform(patrones_norm).tocsr()
+
+        write_artifact(
+            path,
+            source_sha=sha,
+            params=cls._vectorizer_params(),
+            vocabulary=vectorizer.get_feature_names_out().tolist(),
+            idf=vectorizer.idf_,
+            matriz=matriz,
+            patrones=patrones_norm,
+            respuestas=respuestas,
+            tags=tags,
+        )
+        return {
+            "path": str(path),
+            "source_sha256": sha,
+            "patterns": matriz.shape[0],
+            "features": matriz.shape[1],
+        }
 
-        return patrones_norm, respuestas, tags
+    @classmethod
+    def _load_artifact(cls, sha: Optional[str]):
+        """
+        Abre el artefacto con memmap. Retorna None si no existe, es
+        inválido o fue compilado desde otro intents.json / otros params.
+        """
+        try:
+            art = read_artifact(cls._artifact_path)
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+
+        if art.get("source_sha256") != sha or art.get("params") != cls._vectorizer_params():
+            return None
+
+        from scipy.sparse import csr_matrix
+
+        vocabulary = {t: i for i, t in enumerate(art["vocabulary"])}
+        vectorizer = cls._new_vectorizer(vocabulary=vocabulary)
+        vectorizer.idf_ = art["arrays"]["idf"]
+
+        arrays = art["arrays"]
+        matriz = csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=tuple(art["shape"]),
+            copy=False,
+        )
+        return vectorizer, matriz, art["patrones"], art["respuestas"], art["tags"]
+
+    @classmethod
+    def _build_model(cls, version) -> ChatbotModel:
+        """
+        Arma el modelo y los tres niveles de búsqueda:
+        - exactos: hash patrón normalizado -> fila
+        - indice: índice invertido token -> filas candidatas
+        - matriz: TF-IDF CSR con filas normalizadas L2
+        Primero intenta el artefacto compilado (memmap, sin ajustar
+        sklearn); si falta o está viejo lo recompila. Si no se puede
+        escribir, ajusta en memoria.
+        No toca el estado de la clase: el modelo se publica con _swap.
+        """
+        sha = source_sha256(cls._intents_path)
+
+        loaded = cls._load_artifact(sha)
+        if loaded is None:
+            try:
+                cls.compile_artifact()
+                loaded = cls._load_artifact(sha)
+            except (OSError, ValueError):
+                loaded = None
+
+        if loaded is not None:
+            vectorizer, matriz, patrones_norm, respuestas, tags = loaded
+        else:
+            patrones_norm, respuestas, tags = cls._build_dataset(cls._load_data())
+            vectorizer, matriz = None, None
+            if patrones_norm:
+                vectorizer = cls._new_vectorizer()
+                try:
+                    matriz = vectorizer.fit_transform(patrones_norm).tocsr()
+                except ValueError:
+                    # vocabulario vacío (todo stopwords)
+                    vectorizer = None
+
+        exactos: Dict[str, Tuple[int, float]] = {}
+        indice: Dict[str, List[int]] = {}
+        if vectorizer is not None:
+            for fila, patron in enumerate(patrones_norm):
+                for token in cls._tokens(patron):
+                    indice.setdefault(token, []).append(fila)
+
+            # el nivel exacto guarda el mismo ganador que daría el coseno
+            # (mismo desempate que el matcher original, ver _ganador) y su
+            # score: un patrón sin tokens útiles (todo stopwords) puntúa 0
+            sims_patrones = (matriz @ matriz.T).tocsr()
+            todas = range(len(patrones_norm))
+            for fila, patron in enumerate(patrones_norm):
+                if patron in exactos:
+                    continue
+                sims = sims_patrones[fila].toarray().ravel()
+                mejor = cls._ganador(sims, todas, len(patrones_norm))
+                exactos[patron] = (mejor, float(sims[mejor]))
+
+        return ChatbotModel(vectorizer, matriz, respuestas, tags, exactos, indice, version)
+
+    @classmethod
+    def _swap(cls, force: bool = False) -> ChatbotModel:
+        # llamar con _reload_lock tomado
+        version = cls._intents_version()
+        actual = cls._model_cache
+        if not force and actual is not None and actual.version == version:
+            # otro hilo ya publicó esta versión
+            return actual
+
+        nuevo = cls._build_model(version)
+
+        # publicar es una sola asignación de referencia: los requests en
+        # curso conservan el modelo viejo que ya tomaron
+        cls._model_cache = nuevo
+        cls._last_check = time.monotonic()
+        cls._reply_cache.clear()
+        return nuevo
+
+    @classmethod
+    def reload(cls, force: bool = True) -> ChatbotModel:
+        """
+        Recarga intents.json y publica el modelo nuevo. Si otro hilo
+        está recargando, espera y reutiliza su resultado (single-flight).
+        """
+        with cls._reload_lock:
+            return cls._swap(force=force)
+
+    @classmethod
+    def _get_model(cls) -> ChatbotModel:
+        model = cls._model_cache
+        if model is None:
+            # primer uso: todos esperan al único hilo que construye
+            return cls.reload(force=False)
+
+        now = time.monotonic()
+        if now - cls._last_check < cls.RELOAD_CHECK_SECONDS:
+            return model
+        cls._last_check = now
+
+        if cls._intents_version() == model.version:
+            return model
+
+        # el archivo cambió: si otro hilo ya está recargando, seguimos
+        # respondiendo con el modelo viejo en lugar de bloquear
+        if not cls._reload_lock.acquire(blocking=False):
+            return model
+        try:
+            return cls._swap()
+        finally:
+            cls._reload_lock.release()
+
+    @classmethod
+    def warm_up(cls) -> None:
+        """
+        Carga el modelo (y con él numpy/scipy/sklearn) por adelantado,
+        por ejemplo en el master de gunicorn antes del fork.
+        """
+        model = cls._get_model()
+        if model.vectorizer is not None:
+            # el primer transform inicializa el analizador y sus regex
+            model.vectorizer.transform(["hola"])
+
+    @classmethod
+    def model_info(cls) -> Dict[str, Any]:
+        model = cls._get_model()
+        return {
+            "version": list(model.version) if model.version else None,
+            "patterns": len(model.tags),
+            "intents": len(set(model.tags)),
+        }
 
     # -----------------------------
     # Core: similitud
     # -----------------------------
+    @staticmethod
+    def _ganador(sims, filas, n_patrones: int) -> int:
+        """
+        Posición (en filas) del patrón ganador. Sin empate es el máximo.
+        Con empate se desempata como el matcher original,
+        sims.argsort()[0][-1] sobre TODAS las filas (quicksort no estable:
+        no siempre gana la primera ni la última). Las filas fuera de la
+        lista corta no comparten tokens con el mensaje: su coseno es 0.
+        """
+        mejor = int(sims.argmax())
+        if int((sims == sims[mejor]).sum()) == 1:
+            return mejor
+
+        import numpy as np
+
+        completo = np.zeros(n_patrones, dtype=sims.dtype)
+        completo[filas] = sims
+        return list(filas).index(int(completo.argsort()[-1]))
+
     @classmethod
-    def _best_match(
-        cls, message: str, threshold: float = 0.25
-    ) -> Tuple[str, float, Optional[str]]:
+    def _best_match_many(
+        cls,
+        msgs_norm: List[str],
+        threshold: float = 0.25,
+        model: Optional[ChatbotModel] = None,
+    ) -> List[Tuple[str, float, Optional[str], str]]:
         """
-        Retorna (respuesta, score, tag)
+        Recibe mensajes YA normalizados y retorna una lista de
+        (respuesta, score, tag, tier) alineada con la entrada.
+
+        Niveles, en orden:
+          1. "exact": el mensaje es idéntico a un patrón (lookup O(1))
+          2. "index": el índice invertido no encuentra candidatos
+             => fallback sin tocar el vectorizer
+          3. "tfidf": coseno solo contra los candidatos del índice
+        Los mensajes que llegan al nivel 3 comparten un solo transform.
         """
-        msg = cls.normalizar(message)
+        results: List[Optional[Tuple[str, float, Optional[str], str]]] = [None] * len(msgs_norm)
 
-        if not msg:
-            return ("Decime tu consulta para poder ayudarte 🙂", 1.0, "empty")
+        if model is None:
+            model = cls._get_model()
 
-        patrones_norm, respuestas, tags = cls._get_dataset()
-        if not patrones_norm:
-            return ("El chatbot no tiene conocimiento cargado (intents.json vacío).", 0.0, None)
+        pendientes, candidatos = [], []
+        for i, msg in enumerate(msgs_norm):
+            if not msg:
+                results[i] = ("Decime tu consulta para poder ayudarte 🙂", 1.0, "empty", "empty")
+                continue
 
-        try:
-            vectorizer = TfidfVectorizer(
-                ngram_range=(1, 2),
-                stop_words=sorted(cls.STOPWORDS_ES)
-            )
-            tfidf = vectorizer.fit_transform(patrones_norm + [msg])
-            sims = cosine_similarity(tfidf[-1], tfidf[:-1])
+            if model.vectorizer is None:
+                results[i] = ("El chatbot no tiene conocimiento cargado (intents.json vacío).", 0.0, None, "empty")
+                continue
+
+            # 1) hash exacto
+            exacto = model.exactos.get(msg)
+            if exacto is not None:
+                fila, score = exacto
+                if score < threshold:
+                    results[i] = (cls.FALLBACK, score, None, "exact")
+                else:
+                    results[i] = (model.respuestas[fila], score, model.tags[fila], "exact")
+                continue
+
+            # 2) índice invertido: patrones que comparten algún token
+            filas = set()
+            for token in cls._tokens(msg):
+                filas.update(model.indice.get(token, ()))
 
-            idx = sims.argsort()[0][-1]
-            score = float(sims[0][idx])
+            if not filas:
+                results[i] = (cls.FALLBACK, 0.0, None, "index")
+                continue
+
+            pendientes.append(i)
+            candidatos.append(sorted(filas))
+
+        if not pendientes:
+            return results
+
+        # 3) coseno restringido a la lista corta.
+        # Filas y consultas vienen normalizadas L2 => coseno = producto punto
+        q = model.vectorizer.transform([msgs_norm[i] for i in pendientes])
+
+        for pos, i in enumerate(pendientes):
+            filas = candidatos[pos]
+            sims = (model.matriz[filas] @ q[pos].T).toarray().ravel()
+
+            mejor = cls._ganador(sims, filas, len(model.tags))
+            score = float(sims[mejor])
+            idx = filas[mejor]
 
             if score < threshold:
-                return (cls.FALLBACK, score, None)
+                results[i] = (cls.FALLBACK, score, None, "tfidf")
+            else:
+                results[i] = (model.respuestas[idx], score, model.tags[idx], "tfidf")
 
-            return (respuestas[idx], score, tags[idx])
+        return results
 
-        except ValueError:
-            return (cls.FALLBACK, 0.0, None)
+    @classmethod
+    def _best_match(
+        cls, message: str, threshold: float = 0.25
+    ) -> Tuple[str, float, Optional[str]]:
+        """
+        Retorna (respuesta, score, tag)
+        """
+        return cls._best_match_many([cls.normalizar(message)], threshold=threshold)[0][:3]
 
     # -----------------------------
     # API: respuesta + contexto
     # -----------------------------
+    @classmethod
+    def _context_reply(cls, msg_norm: str, ctx: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Si venimos de pregunta_agendar, manejar sí/no sin TF-IDF.
+        Retorna None si el mensaje debe seguir el flujo normal.
+        """
+        if ctx != "pregunta_agendar":
+            return None
+
+        if msg_norm in cls.AFIRMACIONES:
+            return {
+                "response": f"¡Perfecto! {cls.PASOS_AGENDAR}",
+                "next_context": None,
+                "tag": "agendar_cita",
+                "score": 1.0,
+                "tier": "context"
+            }
+        if msg_norm in cls.NEGACIONES:
+            return {
+                "response": "Entendido 🙂 ¿Te ayudo con horario, precio, ubicación o contacto?",
+                "next_context": None,
+                "tag": "negacion",
+                "score": 1.0,
+                "tier": "context"
+            }
+        # si no fue sí/no, continuamos normal; el contexto se limpia
+        # para evitar loops
+        return None
+
+    @classmethod
+    def _build_reply(
+        cls, respuesta: str, score: float, tag: Optional[str], tier: str
+    ) -> Dict[str, Any]:
+        # Si el bot acaba de preguntar por agendar, setear contexto
+        next_ctx = None
+        # normalizar está memoizado: las respuestas son un conjunto fijo
+        if "te gustaria agendar" in cls.normalizar(respuesta):
+            next_ctx = "pregunta_agendar"
+
+        return {
+            "response": respuesta,
+            "next_context": next_ctx,
+            "tag": tag,
+            "score": score,
+            "tier": tier
+        }
+
     @classmethod
     def reply(
         cls,
@@ -173,45 +566,83 @@ class ChatbotService:
         Salida:
           - response: texto del bot
           - next_context: contexto nuevo
-          - tag, score: opcional útil para debug
-        """
-        msg_norm = cls.normalizar(message)
-        ctx = context or None
-
-        # 1) Si venimos de pregunta_agendar, manejar sí/no sin TF-IDF
-        if ctx == "pregunta_agendar":
-            if msg_norm in cls.AFIRMACIONES:
-                return {
-                    "response": f"¡Perfecto! {cls.PASOS_AGENDAR}",
-                    "next_context": None,
-                    "tag": "agendar_cita",
-                    "score": 1.0
-                }
-            if msg_norm in cls.NEGACIONES:
-                return {
-                    "response": "Entendido 🙂 ¿Te ayudo con horario, precio, ubicación o contacto?",
-                    "next_context": None,
-                    "tag": "negacion",
-                    "score": 1.0
-                }
-            # si no fue sí/no, continuamos normal (sin perder contexto)
-            # pero normalmente es mejor limpiar el contexto para evitar loops:
-            ctx = None
-
-        # 2) Normal TF-IDF
-        respuesta, score, tag = cls._best_match(message, threshold=threshold)
-
-        # 3) Si el bot acaba de preguntar por agendar, setear contexto
-        next_ctx = None
-        if "te gustaria agendar" in cls.normalizar(respuesta) or "te gustaría agendar" in respuesta.lower():
-            next_ctx = "pregunta_agendar"
+          - tag, score, tier: opcional útil para debug
+            (tier: context | empty | exact | index | tfidf)
+        """
+        return cls.reply_many([{"message": message, "context": context}], threshold=threshold)[0]
 
-        return {
-            "response": respuesta,
-            "next_context": next_ctx,
-            "tag": tag,
-            "score": score
-        }
+    @staticmethod
+    def _invalid_item(item) -> Optional[str]:
+        # message se normaliza (str) y context es parte de la clave del
+        # cache (tiene que ser hasheable): se validan antes de usarlos
+        if not isinstance(item, dict):
+            return "invalid_message"
+        message = item.get("message")
+        if message is not None and not isinstance(message, str):
+            return "invalid_message"
+        context = item.get("context")
+        if context is not None and not isinstance(context, (str, int, float, bool)):
+            return "invalid_context"
+        return None
+
+    @classmethod
+    def reply_many(
+        cls,
+        items: List[Dict[str, Any]],
+        threshold: float = 0.25
+    ) -> List[Dict[str, Any]]:
+        """
+        Versión en lote de reply: items es una lista de
+        {"message": str, "context": str | None}. Los mensajes que no
+        resuelve el contexto se puntúan juntos en una sola pasada.
+        Un item inválido no corta el lote: su resultado es
+        {"error": "invalid_message" | "invalid_context"}.
+        """
+        # un solo snapshot del modelo para todo el lote, aunque se
+        # publique una versión nueva a mitad de camino
+        model = cls._get_model()
+        version = model.version
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        pendientes, pendientes_norm, pendientes_key = [], [], []
+
+        for i, item in enumerate(items):
+            error = cls._invalid_item(item)
+            if error:
+                results[i] = {"error": error}
+                continue
+
+            msg_norm = cls.normalizar(item.get("message") or "")
+            ctx = item.get("context") or None
+
+            # los hits del cache no tocan el vectorizer
+            key = (msg_norm, ctx, threshold, version)
+            cached = cls._reply_cache.get(key)
+            if cached is not None:
+                results[i] = dict(cached)
+                continue
+
+            ctx_result = cls._context_reply(msg_norm, ctx)
+            if ctx_result is not None:
+                cls._reply_cache.set(key, ctx_result)
+                results[i] = dict(ctx_result)
+                continue
+
+            pendientes.append(i)
+            pendientes_norm.append(msg_norm)
+            pendientes_key.append(key)
+
+        matches = cls._best_match_many(pendientes_norm, threshold=threshold, model=model)
+        for i, key, (respuesta, score, tag, tier) in zip(pendientes, pendientes_key, matches):
+            result = cls._build_reply(respuesta, score, tag, tier)
+            cls._reply_cache.set(key, result)
+            results[i] = dict(result)
+
+        return results
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        return cls._reply_cache.stats()
 
     # Si querés mantener el método viejo:
     @classmethod
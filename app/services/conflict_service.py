@@ -0,0 +1,137 @@
+# app/services/conflict_service.py
+import uuid
+
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models import Appointment, PlannerItem, TherapistTimeOff
+from app.utils.intervals import IntervalIndex, to_minutes
+
+# estados que ocupan la agenda (los mismos del EXCLUDE appointments_no_overlap)
+BUSY_STATUSES = ("confirmed", "completed")
+OVERLAP_CONSTRAINT = "appointments_no_overlap"
+
+# items del planner que ocupan al terapeuta; "event" es solo informativo
+BLOCKING_PLANNER_KINDS = ("block", "manual_appointment")
+
+
+class ScheduleConflict(Exception):
+    """El horario pedido se superpone con citas, bloqueos o items del planner."""
+
+    def __init__(self, conflicts: list):
+        super().__init__("schedule conflict")
+        self.conflicts = conflicts
+
+
+class ConflictService:
+
+    @staticmethod
+    def is_overlap_violation(exc: IntegrityError) -> bool:
+        """
+        True si el IntegrityError viene del EXCLUDE appointments_no_overlap
+        (otra confirmación ganó la carrera). FK, NOT NULL u otros UNIQUE no
+        son conflictos de agenda.
+        """
+        diag = getattr(exc.orig, "diag", None)
+        return getattr(diag, "constraint_name", None) == OVERLAP_CONSTRAINT
+
+    @staticmethod
+    def _window_index(lo, hi, exclude_appointment_ids=(), exclude_planner_ids=()) -> IntervalIndex:
+        """
+        Carga en un índice de intervalos todo lo que ocupa la agenda en
+        [lo, hi): tres consultas con solo las columnas necesarias.
+        """
+        items = []
+
+        appts = db.session.query(
+            Appointment.id, Appointment.status,
+            Appointment.scheduled_start, Appointment.scheduled_end,
+        ).filter(
+            Appointment.status.in_(BUSY_STATUSES),
+            Appointment.scheduled_start < hi,
+            Appointment.scheduled_end > lo,
+        )
+        if exclude_appointment_ids:
+            appts = appts.filter(Appointment.id.notin_(list(exclude_appointment_ids)))
+        for appt_id, status, s, e in appts.all():
+            items.append((to_minutes(s), to_minutes(e, ceil=True), {
+                "type": "appointment", "id": str(appt_id), "status": status,
+                "start": s.isoformat(), "end": e.isoformat(),
+            }))
+
+        planner = db.session.query(
+            PlannerItem.id, PlannerItem.kind, PlannerItem.title,
+            PlannerItem.appointment_id, PlannerItem.start_at, PlannerItem.end_at,
+        ).filter(
+            PlannerItem.kind.in_(BLOCKING_PLANNER_KINDS),
+            PlannerItem.start_at < hi,
+            PlannerItem.end_at > lo,
+        )
+        if exclude_planner_ids:
+            planner = planner.filter(PlannerItem.id.notin_(list(exclude_planner_ids)))
+        for item_id, kind, title, appt_id, s, e in planner.all():
+            # el item del planner de la propia cita no es un conflicto
+            if appt_id is not None and appt_id in exclude_appointment_ids:
+                continue
+            items.append((to_minutes(s), to_minutes(e, ceil=True), {
+                "type": "planner_item", "id": str(item_id), "kind": kind, "title": title,
+                "start": s.isoformat(), "end": e.isoformat(),
+            }))
+
+        time_off = db.session.query(
+            TherapistTimeOff.id, TherapistTimeOff.reason,
+            TherapistTimeOff.start_at, TherapistTimeOff.end_at,
+        ).filter(
+            TherapistTimeOff.start_at < hi,
+            TherapistTimeOff.end_at > lo,
+        )
+        for off_id, reason, s, e in time_off.all():
+            items.append((to_minutes(s), to_minutes(e, ceil=True), {
+                "type": "time_off", "id": str(off_id), "reason": reason,
+                "start": s.isoformat(), "end": e.isoformat(),
+            }))
+
+        return IntervalIndex(items)
+
+    @staticmethod
+    def find_conflicts(candidates: list, exclude_appointment_ids=(), exclude_planner_ids=()) -> dict:
+        """
+        candidates: [(key, start, end)]. Retorna {key: [conflictos]} solo
+        para las claves con conflicto; incluye solapamientos entre los
+        propios candidatos (lotes). No escribe nada.
+        """
+        if not candidates:
+            return {}
+
+        # UUID en todos lados: se comparan contra PlannerItem.appointment_id
+        exclude_appointment_ids = {uuid.UUID(str(i)) for i in exclude_appointment_ids}
+        exclude_planner_ids = {uuid.UUID(str(i)) for i in exclude_planner_ids}
+        lo = min(c[1] for c in candidates)
+        hi = max(c[2] for c in candidates)
+        index = ConflictService._window_index(
+            lo, hi, exclude_appointment_ids, exclude_planner_ids
+        )
+        batch = IntervalIndex(
+            (to_minutes(s), to_minutes(e, ceil=True), key) for key, s, e in candidates
+        )
+
+        result = {}
+        for key, start, end in candidates:
+            s, e = to_minutes(start), to_minutes(end, ceil=True)
+            found = index.overlapping(s, e)
+            found += [
+                {"type": "batch", "id": str(other)}
+                for other in batch.overlapping(s, e) if other != key
+            ]
+            if found:
+                result[key] = found
+        return result
+
+    @staticmethod
+    def check(key, start, end, exclude_appointment_ids=(), exclude_planner_ids=()) -> None:
+        """Lanza ScheduleConflict con la lista de conflictos de un solo intervalo."""
+        conflicts = ConflictService.find_conflicts(
+            [(key, start, end)], exclude_appointment_ids, exclude_planner_ids
+        )
+        if conflicts:
+            raise ScheduleConflict(conflicts[key])
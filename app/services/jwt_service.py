@@ -19,6 +19,26 @@ def create_access_token(user_id: str, email: str, role: str) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+# token de vida corta para abrir el stream SSE: EventSource no manda
+# headers y el token viaja en la URL (queda en logs de proxies/servidor),
+# así que no puede ser el access token de 8 horas
+STREAM_SCOPE = "sse"
+STREAM_TOKEN_SECONDS = int(os.getenv("SSE_TOKEN_TTL_SECONDS", "60"))
+
+
+def create_stream_token(user_id: str, email: str, role: str) -> str:
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": user_id,
+        "email": email,
+        "role": role,
+        "scope": STREAM_SCOPE,
+        "iat": int(now.timestamp()),
+        "exp": int((now + timedelta(seconds=STREAM_TOKEN_SECONDS)).timestamp()),
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
 def decode_token(token: str) -> dict:
     return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
 
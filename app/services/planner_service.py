@@ -1,23 +1,219 @@
 # app/services/planner_service.py
-from datetime import datetime
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import func, literal, literal_column
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+
 from ..extensions import db
 from ..models import PlannerItem
+from .conflict_service import BLOCKING_PLANNER_KINDS, ConflictService
+from .change_feed import ChangeFeed
+from app.utils.intervals import IntervalIndex
 
 ALLOWED_KINDS = {"event", "manual_appointment", "block"}
+TIMESTAMPTZ = TIMESTAMP(timezone=True)
+
+CACHE_BUCKETS = int(os.getenv("PLANNER_CACHE_BUCKETS", "24"))
+CACHE_TTL = float(os.getenv("PLANNER_CACHE_TTL_SECONDS", "60"))
+# rangos de más meses van directo a la base (no vale la pena cachearlos)
+CACHE_MAX_MONTHS = int(os.getenv("PLANNER_CACHE_MAX_MONTHS", "3"))
+
+
+def _utc(dt: datetime) -> datetime:
+    # sin tzinfo se asume UTC (igual que intervals.to_minutes)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _months(date_from: datetime, date_to: datetime) -> list:
+    """Inicios de mes (UTC) que tocan el rango [date_from, date_to]."""
+    m = _utc(date_from).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = _utc(date_to)
+    out = []
+    while m <= end:
+        out.append(m)
+        m = _next_month(m)
+    return out
+
+
+def _next_month(m: datetime) -> datetime:
+    return m.replace(year=m.year + 1, month=1) if m.month == 12 else m.replace(month=m.month + 1)
+
+
+class PlannerRangeCache:
+    """
+    Índices de intervalos de items del planner por mes (UTC), uno por
+    worker. Un mes guarda los items que lo tocan, ya serializados
+    (to_dict, solo lectura), en un IntervalIndex.
+
+    Validez de un mes:
+      - la versión de planner_items (change_versions) con la que se cargó
+        sigue siendo la actual: cubre las escrituras de otros workers;
+      - sin versión (triggers sin instalar, SQLite) vence a los
+        PLANNER_CACHE_TTL_SECONDS.
+    Las escrituras de este worker lo invalidan en el momento (invalidate).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # mes -> (versión, cargado_en, IntervalIndex)
+        self._lock = threading.Lock()
+        # sube con cada invalidación: una carga que empezó antes no se guarda
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, month, version):
+        with self._lock:
+            entry = self._data.get(month)
+            if entry is not None:
+                loaded_version, loaded_at, index = entry
+                if loaded_version == version and (
+                    version is not None or time.monotonic() - loaded_at < self.ttl
+                ):
+                    self._data.move_to_end(month)
+                    self.hits += 1
+                    return index
+                del self._data[month]
+            self.misses += 1
+            return None
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def set(self, month, version, index, generation: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                # hubo una escritura mientras se leía: el índice puede estar viejo
+                return
+            self._data[month] = (version, time.monotonic(), index)
+            self._data.move_to_end(month)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *ranges) -> None:
+        """ranges: (start_at, end_at) de los items escritos (antes y después)."""
+        with self._lock:
+            self._generation += 1
+            for start, end in ranges:
+                if start is None or end is None:
+                    continue
+                for month in _months(start, end):
+                    self._data.pop(month, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "months": len(self._data),
+                "items": sum(len(index) for _, _, index in self._data.values()),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
 
 class PlannerService:
 
+    # el calendario pide las mismas semanas/meses una y otra vez
+    _range_cache = PlannerRangeCache(CACHE_BUCKETS, CACHE_TTL)
+
     @staticmethod
-    def list_items(date_from: datetime, date_to: datetime, kind: str | None = None):
-        q = PlannerItem.query
+    def _overlap_filter(q, lo: datetime, hi: datetime, bounds: str):
+        """
+        Items que intersectan [lo, hi] (bounds '[]') o [lo, hi) (bounds '[)').
+        En Postgres se expresa con tstzrange && para usar el índice GiST
+        idx_planner_items_range (ver FisioterapiaRH_ProyIng.sql).
+        """
+        if db.session.get_bind().dialect.name == "postgresql":
+            # literales en línea: la expresión tiene que ser idéntica a la del índice
+            item_range = func.tstzrange(PlannerItem.start_at, PlannerItem.end_at, literal_column("'[]'"))
+            wanted = func.tstzrange(
+                literal(_utc(lo), TIMESTAMPTZ), literal(_utc(hi), TIMESTAMPTZ),
+                literal_column(f"'{bounds}'"),
+            )
+            return q.filter(item_range.op("&&")(wanted))
 
-        # items que intersectan el rango
-        q = q.filter(PlannerItem.start_at <= date_to).filter(PlannerItem.end_at >= date_from)
+        q = q.filter(PlannerItem.end_at >= lo)
+        if bounds == "[]":
+            return q.filter(PlannerItem.start_at <= hi)
+        return q.filter(PlannerItem.start_at < hi)
 
-        if kind:
-            q = q.filter(PlannerItem.kind == kind)
+    @staticmethod
+    def _month_index(month: datetime, version) -> IntervalIndex:
+        cache = PlannerService._range_cache
+        index = cache.get(month, version)
+        if index is not None:
+            return index
 
-        return q.order_by(PlannerItem.start_at.asc()).all()
+        generation = cache.generation()
+        rows = PlannerService._overlap_filter(
+            PlannerItem.query, month, _next_month(month), "[)"
+        ).all()
+        # valor (inicio, dict): el inicio normalizado sirve para ordenar al unir meses
+        index = IntervalIndex(
+            (_utc(i.start_at), _utc(i.end_at), (_utc(i.start_at), i.to_dict())) for i in rows
+        )
+        cache.set(month, version, index, generation)
+        return index
+
+    @staticmethod
+    def list_items(date_from: datetime, date_to: datetime, kind: str | None = None, version=None) -> list:
+        """
+        Items (dicts) que intersectan [date_from, date_to], por start_at.
+
+        version: versión actual de planner_items (VersionService.versions),
+        la que valida el cache entre workers. Rangos de hasta
+        PLANNER_CACHE_MAX_MONTHS meses se responden desde los índices por
+        mes en O(log n + k) sin tocar la base; el resto va a la base.
+        """
+        months = _months(date_from, date_to)
+        if not months or len(months) > CACHE_MAX_MONTHS:
+            # rango largo (o invertido): consulta directa
+            q = PlannerItem.query
+            if date_from <= date_to:
+                q = PlannerService._overlap_filter(q, date_from, date_to, "[]")
+            else:
+                q = q.filter(PlannerItem.start_at <= date_to).filter(PlannerItem.end_at >= date_from)
+            if kind:
+                q = q.filter(PlannerItem.kind == kind)
+            return [i.to_dict() for i in q.order_by(PlannerItem.start_at.asc()).all()]
+
+        lo, hi = _utc(date_from), _utc(date_to)
+        found = {}
+        for month in months:
+            # un item que cruza meses está en varios índices: dedupe por id
+            for start, item in PlannerService._month_index(month, version).overlapping(lo, hi, closed=True):
+                if not kind or item["kind"] == kind:
+                    found[item["id"]] = (start, item)
+
+        return [item for _, item in sorted(found.values(), key=lambda x: (x[0], x[1]["id"]))]
+
+    @staticmethod
+    def invalidate_cache() -> None:
+        PlannerService._range_cache.clear()
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return PlannerService._range_cache.stats()
 
     @staticmethod
     def create_item(payload: dict) -> PlannerItem:
@@ -37,7 +233,15 @@ class PlannerService:
         if end_at <= start_at:
             raise ValueError("end_at must be greater than start_at")
 
+        if kind in BLOCKING_PLANNER_KINDS:
+            appt_id = payload.get("appointment_id")
+            ConflictService.check(
+                "new", start_at, end_at,
+                exclude_appointment_ids={appt_id} if appt_id else (),
+            )
+
         item = PlannerItem(
+            id=uuid.uuid4(),
             kind=kind,
             title=title,
             note=payload.get("note"),
@@ -51,11 +255,14 @@ class PlannerService:
 
         db.session.add(item)
         db.session.commit()
+        PlannerService._range_cache.invalidate((start_at, end_at))
+        ChangeFeed.publish_local("planner_items", "INSERT", [item.id])
         return item
 
     @staticmethod
     def update_item(item_id, payload: dict) -> PlannerItem:
         item = PlannerItem.query.get_or_404(item_id)
+        old_range = (item.start_at, item.end_at)
 
         if "kind" in payload:
             if payload["kind"] not in ALLOWED_KINDS:
@@ -86,12 +293,24 @@ class PlannerService:
         if item.end_at <= item.start_at:
             raise ValueError("end_at must be greater than start_at")
 
+        if item.kind in BLOCKING_PLANNER_KINDS:
+            ConflictService.check(
+                item.id, item.start_at, item.end_at,
+                exclude_appointment_ids={item.appointment_id} if item.appointment_id else (),
+                exclude_planner_ids={item.id},
+            )
+
         item.updated_at = datetime.utcnow()
         db.session.commit()
+        PlannerService._range_cache.invalidate(old_range, (item.start_at, item.end_at))
+        ChangeFeed.publish_local("planner_items", "UPDATE", [item_id])
         return item
 
     @staticmethod
     def delete_item(item_id):
         item = PlannerItem.query.get_or_404(item_id)
+        old_range = (item.start_at, item.end_at)
         db.session.delete(item)
         db.session.commit()
+        PlannerService._range_cache.invalidate(old_range)
+        ChangeFeed.publish_local("planner_items", "DELETE", [item_id])
@@ -1,52 +1,91 @@
+import os
 from psycopg2.extras import RealDictCursor
 from app.db import get_connection
+from app.utils.ttl_cache import TTLCache
+
 
 class SiteService:
+    # cache por worker: key -> (data, etag). El etag sale del updated_at
+    # que mantiene el trigger set_updated_at, así que todos los workers
+    # calculan el mismo etag para la misma versión de la fila. Los demás
+    # workers ven un cambio a más tardar en SITE_CACHE_TTL_SECONDS.
+    _cache = TTLCache(maxsize=8, ttl=float(os.getenv("SITE_CACHE_TTL_SECONDS", "30")))
 
     @staticmethod
-    def get_info():
-        conn = get_connection()
-        try:
+    def _etag(key: str, updated_at) -> str | None:
+        if updated_at is None:
+            return None
+        return f"{key}-{int(updated_at.timestamp() * 1_000_000)}"
+
+    @staticmethod
+    def _entry(key: str, row):
+        if not row:
+            return None, None
+        return {key: row[key]}, SiteService._etag(key, row["updated_at"])
+
+    @staticmethod
+    def _read_through(key: str, sql: str):
+        cached = SiteService._cache.get(key)
+        if cached is not None:
+            return cached
+
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT info FROM site_info LIMIT 1;")
-                return cur.fetchone()
-        finally:
-            conn.close()
+                cur.execute(sql)
+                entry = SiteService._entry(key, cur.fetchone())
+
+        SiteService._cache.set(key, entry)
+        return entry
+
+    @staticmethod
+    def get_info_entry():
+        """Retorna (data, etag); data es None si no hay fila."""
+        return SiteService._read_through(
+            "info", "SELECT info, updated_at FROM site_info LIMIT 1;"
+        )
+
+    @staticmethod
+    def get_info():
+        return SiteService.get_info_entry()[0]
 
     @staticmethod
     def update_info(text: str):
-        conn = get_connection()
-        try:
-            with conn.cursor() as cur:
+        with get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
                     UPDATE site_info
                     SET info = %s, updated_at = now()
-                    WHERE id = 1;
+                    WHERE id = 1
+                    RETURNING info, updated_at;
                 """, (text,))
+                row = cur.fetchone()
                 conn.commit()
-        finally:
-            conn.close()
+
+        # invalidación explícita: este worker ya sirve la versión nueva
+        SiteService._cache.set("info", SiteService._entry("info", row))
+
+    @staticmethod
+    def get_location_entry():
+        """Retorna (data, etag); data es None si no hay fila."""
+        return SiteService._read_through(
+            "location", "SELECT location, updated_at FROM site_location LIMIT 1;"
+        )
 
     @staticmethod
     def get_location():
-        conn = get_connection()
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT location FROM site_location LIMIT 1;")
-                return cur.fetchone()
-        finally:
-            conn.close()
+        return SiteService.get_location_entry()[0]
 
     @staticmethod
     def update_location(text: str):
-        conn = get_connection()
-        try:
-            with conn.cursor() as cur:
+        with get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
                     UPDATE site_location
                     SET location = %s, updated_at = now()
-                    WHERE id = 1;
+                    WHERE id = 1
+                    RETURNING location, updated_at;
                 """, (text,))
+                row = cur.fetchone()
                 conn.commit()
-        finally:
-            conn.close()
+
+        SiteService._cache.set("location", SiteService._entry("location", row))
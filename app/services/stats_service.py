@@ -0,0 +1,159 @@
+# app/services/stats_service.py
+import os
+from collections import Counter
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+from ..models import Appointment, AppointmentStat
+
+STATUSES = ("requested", "confirmed", "rejected", "cancelled", "completed")
+
+
+class StatsService:
+    """
+    Contadores del dashboard en la tabla appointment_stats. Cada escritura
+    de citas aplica su delta en la MISMA transacción (consistente entre
+    workers, sin cache en memoria); reconcile() los recalcula desde cero.
+    """
+    # "pagado este mes" se cuenta en el mes local de la clínica
+    TZ = ZoneInfo(os.getenv("CLINIC_TIMEZONE", "UTC"))
+
+    @staticmethod
+    def _month(dt) -> str:
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(StatsService.TZ).strftime("%Y-%m")
+
+    @staticmethod
+    def snapshot(status, is_paid, paid_at) -> Counter:
+        """Contribución de una cita a los contadores."""
+        c = Counter({f"status:{status}": 1})
+        if is_paid:
+            if paid_at is not None:
+                c[f"paid:{StatsService._month(paid_at)}"] += 1
+        else:
+            c["unpaid"] += 1
+        return c
+
+    @staticmethod
+    def delta(before=None, after=None) -> Counter:
+        """
+        before/after: (status, is_paid, paid_at) o None (cita nueva / borrada).
+        Retorna after - before con signo (puede tener valores negativos).
+        """
+        out = Counter()
+        if after is not None:
+            out.update(StatsService.snapshot(*after))
+        if before is not None:
+            out.subtract(StatsService.snapshot(*before))
+        return Counter({k: v for k, v in out.items() if v})
+
+    @staticmethod
+    def _dialect() -> str:
+        return db.session.get_bind().dialect.name
+
+    @staticmethod
+    def _insert():
+        # upsert: ON CONFLICT existe en ambos dialectos con la misma API
+        dialect = sqlite if StatsService._dialect() == "sqlite" else postgresql
+        return dialect.insert(AppointmentStat)
+
+    @staticmethod
+    def _paid_month_expr():
+        if StatsService._dialect() == "sqlite":
+            return func.strftime("%Y-%m", Appointment.paid_at)
+        return func.to_char(
+            func.timezone(StatsService.TZ.key, Appointment.paid_at), "YYYY-MM"
+        )
+
+    @staticmethod
+    def apply(delta: Counter) -> None:
+        """
+        Suma el delta en la transacción en curso (un solo executemany).
+        No hace commit: lo hace el servicio que escribió la cita.
+        """
+        items = sorted((k, v) for k, v in delta.items() if v)
+        if not items:
+            return
+        stmt = StatsService._insert()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AppointmentStat.key],
+            set_={
+                "value": AppointmentStat.value + stmt.excluded.value,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        now = datetime.utcnow()
+        # orden fijo de claves: dos transacciones concurrentes bloquean las
+        # filas en el mismo orden y no hay deadlock
+        db.session.execute(stmt, [
+            {"key": k, "value": v, "updated_at": now} for k, v in items
+        ])
+
+    @staticmethod
+    def get_stats() -> dict:
+        """Lectura por clave primaria: no depende de cuántas citas haya."""
+        month = StatsService._month(datetime.now(timezone.utc))
+        keys = [f"status:{s}" for s in STATUSES] + ["unpaid", f"paid:{month}"]
+
+        rows = dict(
+            db.session.query(AppointmentStat.key, AppointmentStat.value)
+            .filter(AppointmentStat.key.in_(keys))
+            .all()
+        )
+        by_status = {s: int(rows.get(f"status:{s}", 0)) for s in STATUSES}
+        return {
+            "by_status": by_status,
+            "total": sum(by_status.values()),
+            "unpaid": int(rows.get("unpaid", 0)),
+            "paid_this_month": int(rows.get(f"paid:{month}", 0)),
+            "month": month,
+        }
+
+    @staticmethod
+    def reconcile() -> dict:
+        """
+        Recalcula todos los contadores desde appointments (tres GROUP BY) y
+        reemplaza la tabla en una transacción. Retorna {clave: (antes,
+        después)} de las claves que estaban desfasadas.
+        """
+        if StatsService._dialect() == "postgresql":
+            # las escrituras de citas esperan a que termine el recálculo:
+            # ningún delta se pierde ni se cuenta dos veces
+            db.session.execute(text("LOCK TABLE appointment_stats IN EXCLUSIVE MODE"))
+
+        fresh = Counter()
+        for status, n in db.session.query(
+            Appointment.status, func.count()
+        ).group_by(Appointment.status):
+            fresh[f"status:{status}"] = n
+
+        fresh["unpaid"] = db.session.query(func.count(Appointment.id)).filter(
+            Appointment.is_paid.is_(False)
+        ).scalar()
+
+        month = StatsService._paid_month_expr()
+        for m, n in db.session.query(month, func.count()).filter(
+            Appointment.is_paid.is_(True), Appointment.paid_at.isnot(None)
+        ).group_by(month):
+            fresh[f"paid:{m}"] = n
+
+        current = dict(db.session.query(AppointmentStat.key, AppointmentStat.value).all())
+        drift = {
+            k: (current.get(k, 0), fresh.get(k, 0))
+            for k in set(current) | set(fresh)
+            if current.get(k, 0) != fresh.get(k, 0)
+        }
+
+        now = datetime.utcnow()
+        db.session.execute(delete(AppointmentStat))
+        if fresh:
+            db.session.execute(insert(AppointmentStat), [
+                {"key": k, "value": v, "updated_at": now} for k, v in fresh.items() if v
+            ])
+        db.session.commit()
+        return drift
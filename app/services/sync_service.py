@@ -0,0 +1,152 @@
+# app/services/sync_service.py
+import base64
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import joinedload
+
+from ..extensions import db
+from ..models import Appointment, PlannerItem, SyncTombstone, User
+
+NIL_ID = uuid.UUID(int=0)
+
+
+class SyncCursorExpired(Exception):
+    """El cursor es más viejo que la retención de tombstones: resincronizar completo."""
+
+
+class SyncService:
+    """
+    Sincronización incremental para clientes offline:
+    /api/sync?since=<cursor> devuelve lo creado/modificado (por updated_at)
+    y lo borrado (sync_tombstones) después del cursor.
+
+    Cada recurso avanza con su propio keyset (updated_at, id): una
+    transacción grande con muchas filas del mismo updated_at se pagina sin
+    saltearse nada. Cuando un recurso se vacía, su posición vuelve a
+    now() - SYNC_OVERLAP_SECONDS: una transacción que arrancó antes y
+    commiteó después (updated_at "en el pasado") igual se ve en el próximo
+    sync. Las filas del solapamiento llegan repetidas; el cliente las
+    aplica como upsert/borrado idempotente.
+    """
+    OVERLAP = timedelta(seconds=float(os.getenv("SYNC_OVERLAP_SECONDS", "60")))
+    TOMBSTONE_RETENTION = timedelta(days=float(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90")))
+
+    # -----------------------------
+    # Cursor
+    # -----------------------------
+    @staticmethod
+    def encode_cursor(positions: dict) -> str:
+        raw = json.dumps({
+            k: [ts.isoformat(), str(row_id)] for k, (ts, row_id) in positions.items()
+        }, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> dict:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            return {
+                k: (datetime.fromisoformat(ts), uuid.UUID(row_id))
+                for k, (ts, row_id) in data.items()
+                if k in ("appointments", "planner_items", "deleted")
+            }
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError("cursor inválido")
+
+    # -----------------------------
+    # Páginas por recurso
+    # -----------------------------
+    @staticmethod
+    def _db_now() -> datetime:
+        # reloj de la base: el mismo con el que el trigger set_updated_at
+        # escribe updated_at en INSERT y UPDATE
+        return db.session.query(func.now()).scalar()
+
+    @staticmethod
+    def _page(q, ts_col, id_col, pos, limit):
+        if pos is not None:
+            q = q.filter(tuple_(ts_col, id_col) > tuple_(pos[0], pos[1]))
+        rows = q.order_by(ts_col.asc(), id_col.asc()).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    @staticmethod
+    def changes(cursor: str | None, user_id=None, limit: int = 500) -> dict:
+        """
+        user_id None = admin (todo); si no, solo las citas de ese usuario
+        y sin items del planner. Sin cursor: snapshot completo paginado.
+        """
+        positions = SyncService.decode_cursor(cursor) if cursor else {}
+        if user_id is not None:
+            user_id = uuid.UUID(str(user_id))
+        now = SyncService._db_now()
+        drained = (now - SyncService.OVERLAP, NIL_ID)
+
+        deleted_pos = positions.get("deleted")
+        if cursor and (deleted_pos is None or deleted_pos[0] < now - SyncService.TOMBSTONE_RETENTION):
+            # las marcas de borrado de ese período ya se purgaron
+            raise SyncCursorExpired()
+
+        has_more = False
+        result = {"appointments": [], "planner_items": [], "deleted": {"appointments": [], "planner_items": []}}
+
+        # citas (to_dict lee user.full_name: mismo SELECT, sin N+1)
+        q = Appointment.query.options(
+            joinedload(Appointment.user).load_only(User.id, User.full_name)
+        )
+        if user_id is not None:
+            q = q.filter(Appointment.user_id == user_id)
+        rows, more = SyncService._page(
+            q, Appointment.updated_at, Appointment.id, positions.get("appointments"), limit
+        )
+        result["appointments"] = [a.to_dict() for a in rows]
+        positions["appointments"] = (rows[-1].updated_at, rows[-1].id) if more else drained
+        has_more |= more
+
+        # planner: solo admin (agenda del terapeuta)
+        if user_id is None:
+            rows, more = SyncService._page(
+                PlannerItem.query, PlannerItem.updated_at, PlannerItem.id,
+                positions.get("planner_items"), limit,
+            )
+            result["planner_items"] = [i.to_dict() for i in rows]
+            positions["planner_items"] = (rows[-1].updated_at, rows[-1].id) if more else drained
+            has_more |= more
+
+        # borrados: en el primer sync no hay nada que borrar del lado del cliente
+        if cursor:
+            q = db.session.query(
+                SyncTombstone.id, SyncTombstone.resource,
+                SyncTombstone.row_id, SyncTombstone.deleted_at,
+            )
+            if user_id is not None:
+                q = q.filter(
+                    SyncTombstone.resource == "appointments",
+                    SyncTombstone.owner_id == user_id,
+                )
+            rows, more = SyncService._page(
+                q, SyncTombstone.deleted_at, SyncTombstone.id, positions.get("deleted"), limit
+            )
+            for r in rows:
+                result["deleted"].setdefault(r.resource, []).append(str(r.row_id))
+            positions["deleted"] = (rows[-1].deleted_at, rows[-1].id) if more else drained
+            has_more |= more
+        else:
+            positions["deleted"] = drained
+
+        result["cursor"] = SyncService.encode_cursor(positions)
+        result["has_more"] = has_more
+        return result
+
+    @staticmethod
+    def purge_tombstones() -> int:
+        """Borra marcas más viejas que la retención (los cursores de antes dan 410)."""
+        n = SyncTombstone.query.filter(
+            SyncTombstone.deleted_at < SyncService._db_now() - SyncService.TOMBSTONE_RETENTION
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return n
@@ -0,0 +1,43 @@
+# app/services/version_service.py
+import hashlib
+
+from ..extensions import db
+from ..models import ChangeVersion
+
+
+class VersionService:
+
+    @staticmethod
+    def versions(resources) -> dict:
+        """{resource: version} en una consulta por PK."""
+        return dict(
+            db.session.query(ChangeVersion.resource, ChangeVersion.version)
+            .filter(ChangeVersion.resource.in_(list(resources)))
+            .all()
+        )
+
+    @staticmethod
+    def etag(resources, *scope, versions: dict | None = None) -> str | None:
+        """
+        ETag de un listado: versiones de las tablas de las que depende más
+        todo lo que cambia el cuerpo para la misma versión (filtros, usuario).
+        None si falta algún contador (triggers sin instalar): sin ETag, el
+        listado responde 200 como siempre.
+
+        Se calcula ANTES de leer las filas: si un cambio entra en el medio,
+        el ETag queda viejo y el próximo poll trae 200; nunca un 304 de más.
+        versions: resultado de versions() si el llamador ya lo leyó.
+        """
+        resources = tuple(resources)
+        if versions is None:
+            versions = VersionService.versions(resources)
+        if len(versions) != len(resources):
+            return None
+
+        digest = hashlib.blake2b(digest_size=8)
+        for part in scope:
+            digest.update(repr(part).encode())
+            digest.update(b"\0")
+
+        stamp = "-".join(f"{r}{versions[r]}" for r in resources)
+        return f"{stamp}-{digest.hexdigest()}"
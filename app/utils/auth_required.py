@@ -2,7 +2,34 @@ from functools import wraps
 from flask import request, jsonify, g
 import jwt
 
-from app.services.jwt_service import decode_token
+from app.services.jwt_service import STREAM_SCOPE, decode_token
+
+
+def _authenticate(token: str, scope: str | None = None):
+    """
+    Valida el JWT y llena g; retorna una respuesta de error o None.
+    scope: None para el access token normal, STREAM_SCOPE para el token
+    corto del stream SSE. Cada uno sirve solo donde corresponde.
+    """
+    try:
+        payload = decode_token(token)
+    except jwt.ExpiredSignatureError:
+        return jsonify({"error": "Token expirado"}), 401
+    except jwt.InvalidTokenError:
+        return jsonify({"error": "Token inválido"}), 401
+
+    if payload.get("scope") != scope:
+        return jsonify({"error": "Token inválido para este endpoint"}), 401
+
+    # Guardamos info del usuario en g (global request context)
+    g.jwt = payload
+    g.user_id = payload.get("sub")
+    g.email = payload.get("email")
+    g.role = payload.get("role")
+
+    if not g.user_id or not g.role:
+        return jsonify({"error": "Token inválido (faltan claims)"}), 401
+    return None
 
 
 def auth_required(fn):
@@ -12,22 +39,35 @@ def auth_required(fn):
         if not auth.startswith("Bearer "):
             return jsonify({"error": "Falta Authorization: Bearer <token>"}), 401
 
-        token = auth.split(" ", 1)[1].strip()
-        try:
-            payload = decode_token(token)
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token expirado"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Token inválido"}), 401
-
-        # Guardamos info del usuario en g (global request context)
-        g.jwt = payload
-        g.user_id = payload.get("sub")
-        g.email = payload.get("email")
-        g.role = payload.get("role")
-
-        if not g.user_id or not g.role:
-            return jsonify({"error": "Token inválido (faltan claims)"}), 401
+        error = _authenticate(auth.split(" ", 1)[1].strip())
+        if error:
+            return error
+
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def stream_auth_required(fn):
+    """
+    Como auth_required, pero acepta también ?stream_token=<jwt>:
+    EventSource (SSE) del navegador no puede mandar el header
+    Authorization. En la URL solo vale el token corto de
+    POST /api/events/stream-token, nunca el access token (la URL queda en
+    logs). Usar solo en endpoints de streaming.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            error = _authenticate(auth.split(" ", 1)[1].strip())
+        else:
+            token = request.args.get("stream_token", "").strip()
+            if not token:
+                return jsonify({"error": "Falta Authorization: Bearer <token> o stream_token"}), 401
+            error = _authenticate(token, scope=STREAM_SCOPE)
+        if error:
+            return error
 
         return fn(*args, **kwargs)
 
@@ -0,0 +1,22 @@
+from flask import Response, request
+
+
+def not_modified(etag: str | None):
+    """
+    Respuesta 304 (sin cuerpo) si el cliente ya tiene `etag`, o None.
+    Permite cortar antes de consultar o serializar filas.
+    """
+    if etag and request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        tag_private(resp, etag)
+        return resp
+    return None
+
+
+def tag_private(resp, etag: str | None):
+    """ETag + revalidar siempre; private: el cuerpo depende del usuario."""
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    if etag:
+        resp.set_etag(etag)
+    return resp
@@ -0,0 +1,134 @@
+"""
+Aritmética de intervalos semiabiertos [inicio, fin) sobre enteros
+(minutos desde epoch). Los enteros hacen que ordenar y comparar sea
+barato y que un rango de varias semanas quepa en listas cortas.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_minutes(dt: datetime, ceil: bool = False) -> int:
+    """
+    datetime -> minutos desde epoch. Los segundos se truncan, o se
+    redondean hacia arriba con ceil=True. Sin tzinfo se asume UTC.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    seconds = (dt - _EPOCH) // timedelta(seconds=1)
+    return -(-seconds // 60) if ceil else seconds // 60
+
+
+def from_minutes(m: int) -> datetime:
+    return datetime.fromtimestamp(m * 60, tz=timezone.utc)
+
+
+def merge(intervals) -> list:
+    """Ordena y une intervalos solapados o contiguos."""
+    out = []
+    for s, e in sorted(intervals):
+        if e <= s:
+            continue
+        if out and s <= out[-1][1]:
+            if e > out[-1][1]:
+                out[-1][1] = e
+        else:
+            out.append([s, e])
+    return [(s, e) for s, e in out]
+
+
+def subtract(open_intervals, busy_intervals) -> list:
+    """
+    Barrido (sweep-line) sobre los bordes de ambos conjuntos: un instante
+    está libre si lo cubre al menos un intervalo abierto y ningún ocupado.
+    O((n + m) log(n + m)) por el ordenamiento; el barrido es lineal.
+    """
+    events = []
+    for s, e in open_intervals:
+        if e > s:
+            events.append((s, 0, 1))
+            events.append((e, 0, -1))
+    for s, e in busy_intervals:
+        if e > s:
+            events.append((s, 1, 1))
+            events.append((e, 1, -1))
+    # en el mismo instante los cierres (-1) van antes que las aperturas:
+    # [9,10) y [10,11) no se solapan
+    events.sort(key=lambda ev: (ev[0], ev[2]))
+
+    free = []
+    open_depth = busy_depth = 0
+    start = None
+    for t, kind, delta in events:
+        if kind == 0:
+            open_depth += delta
+        else:
+            busy_depth += delta
+
+        is_free = open_depth > 0 and busy_depth == 0
+        if is_free and start is None:
+            start = t
+        elif not is_free and start is not None:
+            if t > start:
+                free.append((start, t))
+            start = None
+    return merge(free)
+
+
+def slots(free_intervals, duration: int, step: int) -> list:
+    """
+    Cortes de `duration` minutos dentro de cada intervalo libre. Los
+    inicios caen en múltiplos de `step` (relativos a epoch, o sea alineados
+    a la hora en zonas con offset de horas enteras).
+    """
+    out = []
+    for s, e in free_intervals:
+        t = -(-s // step) * step  # primer múltiplo de step >= s
+        while t + duration <= e:
+            out.append((t, t + duration))
+            t += step
+    return out
+
+
+class IntervalIndex:
+    """
+    Índice estático de intervalos [inicio, fin) con un valor asociado.
+
+    Ordenado por inicio más el máximo de los fines acumulado: una consulta
+    hace bisect sobre los inicios y recorre hacia atrás solo mientras algún
+    intervalo anterior pueda llegar hasta el rango pedido. O(log n + k) en
+    la práctica para agendas (intervalos cortos y sin anidamiento profundo).
+    """
+
+    def __init__(self, items=()):
+        # items: iterable de (inicio, fin, valor)
+        self._items = sorted(items, key=lambda it: (it[0], it[1]))
+        self._starts = [it[0] for it in self._items]
+        self._max_end = []
+        running = None
+        for _, end, _ in self._items:
+            running = end if running is None or end > running else running
+            self._max_end.append(running)
+
+    def __len__(self):
+        return len(self._items)
+
+    def overlapping(self, start, end, closed: bool = False) -> list:
+        """
+        Valores de los intervalos que se solapan con [start, end), por inicio.
+        closed=True compara con extremos incluidos ([start, end] contra
+        [inicio, fin]), como el filtro start_at <= to AND end_at >= from.
+        """
+        if closed:
+            i = bisect_right(self._starts, end) - 1
+        else:
+            i = bisect_left(self._starts, end) - 1
+        out = []
+        while i >= 0 and (self._max_end[i] >= start if closed else self._max_end[i] > start):
+            s, e, value = self._items[i]
+            if e >= start if closed else e > start:
+                out.append(value)
+            i -= 1
+        out.reverse()
+        return out
@@ -0,0 +1,36 @@
+import base64
+import uuid
+from datetime import datetime
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    """Cursor opaco para keyset (created_at, id)."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Inverso de encode_cursor. Lanza ValueError si el cursor es inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except Exception as e:
+        raise ValueError("cursor inválido") from e
+
+
+def parse_limit(value: str | None, default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    if value is None or value == "":
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit debe ser un entero")
+    if not 1 <= limit <= maximum:
+        # fuera de rango es un error del cliente: no recortarlo en silencio
+        raise ValueError(f"limit debe estar entre 1 y {maximum}")
+    return limit
@@ -0,0 +1,86 @@
+"""
+Benchmark y chequeo de paridad del motor de disponibilidad
+(app/utils/intervals.py) con datos sintéticos, sin base de datos.
+
+Genera una plantilla semanal (lun-vie 09-13 y 15-19) para N semanas,
+citas/bloqueos aleatorios, y compara subtract() contra una referencia
+minuto a minuto. Reporta el tiempo de subtract() + slots().
+
+Uso:
+    python benchmarks/bench_availability.py --weeks 12 --busy 400
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.intervals import merge, slots, subtract  # noqa: E402
+
+DAY = 24 * 60
+
+
+def build(weeks: int, busy: int, seed: int):
+    rnd = random.Random(seed)
+    open_iv = []
+    for d in range(weeks * 7):
+        if d % 7 < 5:
+            base = d * DAY
+            open_iv.append((base + 9 * 60, base + 13 * 60))
+            open_iv.append((base + 15 * 60, base + 19 * 60))
+
+    horizon = weeks * 7 * DAY
+    busy_iv = []
+    for _ in range(busy):
+        s = rnd.randrange(0, horizon)
+        busy_iv.append((s, s + rnd.choice([15, 30, 45, 60, 90, 240])))
+    return open_iv, busy_iv
+
+
+def reference(open_iv, busy_iv, horizon):
+    free = bytearray(horizon + 300)
+    for s, e in open_iv:
+        free[s:e] = b"\x01" * (e - s)
+    for s, e in busy_iv:
+        free[s:e] = b"\x00" * (e - s)
+    out, start = [], None
+    for t, v in enumerate(free):
+        if v and start is None:
+            start = t
+        elif not v and start is not None:
+            out.append((start, t))
+            start = None
+    return merge(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--busy", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    open_iv, busy_iv = build(args.weeks, args.busy, args.seed)
+
+    got = subtract(open_iv, busy_iv)
+    expected = reference(open_iv, busy_iv, args.weeks * 7 * DAY)
+    if got != expected:
+        print("ERROR: subtract() difiere de la referencia minuto a minuto")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        free = subtract(open_iv, busy_iv)
+        out = slots(free, 45, 15)
+    elapsed = (time.perf_counter() - t0) / args.repeat
+
+    print(f"semanas={args.weeks} abiertos={len(open_iv)} ocupados={len(busy_iv)}")
+    print(f"libres={len(free)} slots(45/15)={len(out)} paridad=ok")
+    print(f"subtract+slots: {elapsed * 1000:.2f} ms por consulta")
+
+
+if __name__ == "__main__":
+    main()
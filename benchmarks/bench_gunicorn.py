@@ -0,0 +1,175 @@
+"""
+Benchmark de throughput de gunicorn por perfil de worker (sync, gthread,
+gevent) sobre la mezcla de endpoints de la app.
+
+Para cada perfil levanta `gunicorn -c gunicorn.conf.py wsgi:app`, espera
+a que responda, genera carga con N clientes concurrentes durante D
+segundos y reporta req/s, latencia p50/p99 y errores.
+
+Mezclas (--mix):
+  chatbot - solo /chatbot/* (no necesita base de datos)
+  full    - chatbot + /site/info + /site/location + /api/planner/
+            (requiere la base configurada en .env)
+
+Uso:
+    python benchmarks/bench_gunicorn.py --profiles sync gthread gevent \\
+        --mix full --clients 32 --duration 20
+
+Ver la sección "Producción (gunicorn)" del README para los resultados
+de referencia y cómo interpretarlos.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHATBOT_MIX = [
+    (40, "POST", "/chatbot/message", {"message": "hola"}),
+    (20, "POST", "/chatbot/message", {"message": "¿Cuál es el horario?"}),
+    (15, "POST", "/chatbot/message", {"message": "cuanto cuesta una sesion de terapia"}),
+    (10, "POST", "/chatbot/message", {"message": "me duele la rodilla despues de correr"}),
+    (5, "POST", "/chatbot/messages", [{"message": "precio"}, {"message": "ubicacion"}, {"message": "si", "context": "pregunta_agendar"}]),
+]
+
+DB_MIX = [
+    (15, "GET", "/site/info", None),
+    (10, "GET", "/site/location", None),
+    (5, "GET", "/api/planner/?from=2025-01-06T00:00:00Z&to=2025-01-13T00:00:00Z", None),
+]
+
+
+def build_mix(name: str) -> list:
+    mix = list(CHATBOT_MIX)
+    if name == "full":
+        mix += DB_MIX
+    return mix
+
+
+def wait_ready(proc, base_url: str, timeout: float = 60.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            req = urllib.request.Request(
+                base_url + "/chatbot/message",
+                data=json.dumps({"message": "hola"}).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            urllib.request.urlopen(req, timeout=2).read()
+            return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.25)
+    return False
+
+
+def client(base_url, mix, stop_at, latencies, errors, lock):
+    weights = [m[0] for m in mix]
+    local_lat, local_err = [], 0
+    while time.monotonic() < stop_at:
+        _, method, path, body = random.choices(mix, weights=weights)[0]
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            base_url + path,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json"} if data else {},
+        )
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                resp.read()
+            local_lat.append(time.perf_counter() - t0)
+        except (urllib.error.URLError, ConnectionError, OSError):
+            local_err += 1
+
+    with lock:
+        latencies.extend(local_lat)
+        errors[0] += local_err
+
+
+def run_profile(profile, args) -> dict:
+    env = dict(os.environ)
+    env["GUNICORN_PROFILE"] = profile
+    env["GUNICORN_BIND"] = f"127.0.0.1:{args.port}"
+    env["GUNICORN_ACCESSLOG"] = ""  # sin access log: no medir el logging
+    if args.workers:
+        env["GUNICORN_WORKERS"] = str(args.workers)
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        if not wait_ready(proc, base_url):
+            return {"profile": profile, "error": "gunicorn no arrancó (¿falta gevent?)"}
+
+        mix = build_mix(args.mix)
+        latencies, errors, lock = [], [0], threading.Lock()
+        stop_at = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(target=client, args=(base_url, mix, stop_at, latencies, errors, lock))
+            for _ in range(args.clients)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        latencies.sort()
+        ok = len(latencies)
+        return {
+            "profile": profile,
+            "requests": ok,
+            "errors": errors[0],
+            "rps": ok / args.duration,
+            "p50_ms": statistics.median(latencies) * 1000 if ok else None,
+            "p99_ms": latencies[int(ok * 0.99) - 1] * 1000 if ok else None,
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", default=["sync", "gthread", "gevent"])
+    parser.add_argument("--mix", choices=["chatbot", "full"], default="chatbot")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"mezcla={args.mix} clientes={args.clients} duración={args.duration}s")
+    print(f"{'perfil':<8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}")
+    for profile in args.profiles:
+        r = run_profile(profile, args)
+        if "error" in r:
+            print(f"{profile:<8} {r['error']}")
+            continue
+        p50 = f"{r['p50_ms']:.1f}" if r["p50_ms"] is not None else "-"
+        p99 = f"{r['p99_ms']:.1f}" if r["p99_ms"] is not None else "-"
+        print(f"{profile:<8} {r['rps']:9.1f} {p50:>8} {p99:>8} {r['errors']:8d}")
+
+
+if __name__ == "__main__":
+    main()
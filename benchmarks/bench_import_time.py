@@ -0,0 +1,105 @@
+"""
+Benchmark de tiempo de arranque: importa `app` y ejecuta create_app()
+en un proceso limpio con `python -X importtime` y resume el costo por
+módulo (acumulado, en ms).
+
+No abre conexiones a la base: si faltan las variables DB_* se usan
+valores de relleno solo para que la URI sea parseable.
+
+Uso:
+    python benchmarks/bench_import_time.py [--top 25] [--runs 3] [--json salida.json]
+
+Con --json se guarda el resultado para comparar entre releases.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SNIPPET = "from app import create_app; create_app()"
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+DB_DEFAULTS = {
+    "DB_USER": "bench",
+    "DB_PASSWORD": "bench",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "bench",
+}
+
+
+def run_once(env: dict) -> dict:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(proc.returncode)
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, name = m.groups()
+        modules[name] = {
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "top_level": len(indent) <= 1,
+        }
+
+    return {"wall_ms": wall * 1000, "modules": modules}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    for k, v in DB_DEFAULTS.items():
+        env.setdefault(k, v)
+    env.pop("CHATBOT_WARMUP", None)
+
+    # la mejor corrida (menos ruido del sistema)
+    runs = [run_once(env) for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r["wall_ms"])
+    modules = best["modules"]
+
+    import_ms = sum(m["cumulative_ms"] for m in modules.values() if m["top_level"])
+    print(f"create_app(): {best['wall_ms']:.1f} ms de proceso, {import_ms:.1f} ms en imports")
+
+    app_mods = {k: v for k, v in modules.items() if k == "app" or k.startswith("app.")}
+    print("\nMódulos de la app (acumulado):")
+    for name, m in sorted(app_mods.items(), key=lambda kv: -kv[1]["cumulative_ms"]):
+        print(f"  {m['cumulative_ms']:9.1f} ms  {name}")
+
+    print(f"\nTop {args.top} módulos (acumulado):")
+    for name, m in sorted(modules.items(), key=lambda kv: -kv[1]["cumulative_ms"])[: args.top]:
+        print(f"  {m['cumulative_ms']:9.1f} ms  {name}")
+
+    pesados = [n for n in ("sklearn", "scipy", "numpy") if n in modules]
+    print("\nsklearn/scipy/numpy importados al arrancar:", ", ".join(pesados) or "ninguno")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"wall_ms": best["wall_ms"], "import_ms": import_ms, "modules": modules}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
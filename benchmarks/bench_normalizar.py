@@ -0,0 +1,100 @@
+"""
+Microbenchmark de ChatbotService.normalizar.
+
+Compara la implementación original (NFD + unicodedata.category por
+carácter + dos re.sub sin compilar) contra la actual sobre un corpus
+realista armado con los patrones de intents.json y variantes típicas
+de usuarios (mayúsculas, tildes, signos, emojis).
+
+Uso:
+    python benchmarks/bench_normalizar.py [--repeat 5] [--number 20]
+"""
+import argparse
+import json
+import re
+import sys
+import timeit
+import unicodedata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services.chatbot_service import ChatbotService, _normalizar  # noqa: E402
+
+
+def normalizar_original(texto: str) -> str:
+    texto = (texto or "").lower().strip()
+    texto = "".join(
+        c for c in unicodedata.normalize("NFD", texto)
+        if unicodedata.category(c) != "Mn"
+    )
+    texto = re.sub(r"[^a-z0-9\s]", " ", texto)
+    texto = re.sub(r"\s+", " ", texto).strip()
+    return texto
+
+
+def construir_corpus() -> list:
+    with open(ChatbotService._intents_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    corpus = []
+    for intent in data.get("intents", []):
+        for p in intent.get("patterns", []):
+            corpus += [
+                p,
+                p.upper(),
+                f"¿{p.capitalize()}?",
+                f"Hola!! {p}, por favor 🙂",
+                f"  {p}...   gracias  ",
+            ]
+        for r in intent.get("responses", []):
+            corpus.append(r)
+
+    corpus += ["", "Sí", "NO", "¿Cuánto cuesta la sesión?", "ubicación", "Ñandú ß ²"]
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = construir_corpus()
+
+    distintos = [t for t in corpus if normalizar_original(t) != _normalizar(t)]
+    if distintos:
+        print("ERROR: salidas distintas para:", distintos[:10])
+        sys.exit(1)
+
+    def original():
+        for t in corpus:
+            normalizar_original(t)
+
+    def actual_sin_memo():
+        for t in corpus:
+            _normalizar.__wrapped__(t)
+
+    def actual():
+        for t in corpus:
+            _normalizar(t)
+
+    _normalizar.cache_clear()
+    actual()  # llena la memoización (tráfico repetido)
+
+    print(f"corpus: {len(corpus)} textos, {args.number} pasadas x {args.repeat} repeticiones")
+    base = None
+    for nombre, fn in [
+        ("original", original),
+        ("tabla translate", actual_sin_memo),
+        ("tabla + memo", actual),
+    ]:
+        t = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+        por_texto = t / (args.number * len(corpus)) * 1e6
+        base = base or t
+        print(f"{nombre:<16} {por_texto:8.3f} µs/texto   x{base / t:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
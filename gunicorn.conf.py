@@ -0,0 +1,98 @@
+# gunicorn.conf.py
+# Uso: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Perfiles (GUNICORN_PROFILE):
+#   sync    - un request por worker; el más simple, útil si el tráfico es
+#             mayormente CPU (chatbot) y poco I/O. Sin SSE (responde 501).
+#   gthread - workers con hilos (default). Buen balance para Postgres +
+#             chatbot: los hilos esperan I/O sin duplicar el modelo.
+#   gevent  - greenlets; muchas conexiones concurrentes lentas (SSE,
+#             clientes móviles). Requiere `pip install gevent psycogreen`.
+#
+# Todas las variables se pueden sobreescribir por entorno (GUNICORN_*).
+import multiprocessing
+import os
+
+_cpus = multiprocessing.cpu_count()
+
+PROFILES = {
+    "sync": {
+        "worker_class": "sync",
+        "workers": _cpus * 2 + 1,
+        "threads": 1,
+    },
+    "gthread": {
+        "worker_class": "gthread",
+        "workers": _cpus + 1,
+        "threads": 4,
+    },
+    "gevent": {
+        "worker_class": "gevent",
+        "workers": _cpus + 1,
+        "threads": 1,
+        "worker_connections": 1000,
+    },
+}
+
+profile_name = os.getenv("GUNICORN_PROFILE", "gthread")
+if profile_name not in PROFILES:
+    raise RuntimeError(f"GUNICORN_PROFILE inválido: {profile_name} (usar {', '.join(PROFILES)})")
+_profile = PROFILES[profile_name]
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = _profile["worker_class"]
+workers = int(os.getenv("GUNICORN_WORKERS", _profile["workers"]))
+threads = int(os.getenv("GUNICORN_THREADS", _profile["threads"]))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", _profile.get("worker_connections", 1000)))
+
+# streams SSE por worker (SSE_MAX_STREAMS, 0 = deshabilitado). sync: un
+# stream ocupa el worker entero y el arbiter lo mata a los `timeout`
+# segundos. gthread: la mitad de los hilos queda siempre para la API.
+_sse_streams = {
+    "sync": 0,
+    "gthread": threads // 2,
+    "gevent": worker_connections // 2,
+}[worker_class]
+# raw_env se aplica en el master antes de cargar la app (preload_app)
+raw_env = [f"SSE_MAX_STREAMS={os.getenv('SSE_MAX_STREAMS', _sse_streams)}"]
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# reciclar workers de a poco evita crecer en memoria indefinidamente
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+
+# la app se carga en el master y los workers la heredan copy-on-write
+preload_app = True
+
+# GUNICORN_ACCESSLOG vacío desactiva el access log
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-") or None
+# formato por defecto pero con la ruta SIN query string (%(U)s en lugar
+# de %(r)s): los parámetros pueden llevar tokens (?stream_token= del SSE)
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+errorlog = os.getenv("GUNICORN_ERRORLOG", "-")
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def when_ready(server):
+    # con preload_app la app ya está cargada en el master y todavía no
+    # hay workers: momento de calentar lo compartido
+    from app.prefork import warm_up_master
+
+    warm_up_master(server.app.wsgi())
+    server.log.info("master listo: modelo del chatbot precargado (perfil %s)", profile_name)
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen no instalado: psycopg2 bloqueará el loop de gevent")
+
+    from app.prefork import init_worker
+
+    init_worker(server.app.wsgi())
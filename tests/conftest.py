@@ -0,0 +1,70 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.pool import StaticPool
+
+from app import create_app
+from app.extensions import db as _db
+from app.models import Appointment, User
+from app.services.jwt_service import create_access_token
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        # una sola conexión compartida: la base en memoria vive lo que dura el test
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "SQLALCHEMY_ENGINE_OPTIONS": {
+            "poolclass": StaticPool,
+            "connect_args": {"check_same_thread": False},
+        },
+    })
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers():
+    token = create_access_token(str(uuid.uuid4()), "admin@example.com", "admin")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_appointments(rows: int, users: int = 1) -> list:
+    """Citas sintéticas repartidas entre `users` pacientes."""
+    pacientes = [
+        User(full_name=f"Paciente {i}", email=f"p{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+        for i in range(users)
+    ]
+    _db.session.add_all(pacientes)
+    _db.session.flush()
+
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    appts = [
+        Appointment(
+            id=uuid.uuid4(),
+            user_id=pacientes[i % users].id,
+            description=f"Dolor {i}",
+            status="requested",
+            created_at=base + timedelta(minutes=i),
+            updated_at=base + timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ]
+    _db.session.add_all(appts)
+    _db.session.commit()
+    return appts
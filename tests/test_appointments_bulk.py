@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from tests.conftest import make_appointments
+
+
+def confirm(client, headers, items):
+    return client.post("/api/appointments/bulk/confirm", json={"items": items}, headers=headers)
+
+
+def test_bulk_confirm_accepts_naive_and_aware_datetimes(client, admin_headers):
+    a, b = make_appointments(2)
+    # sin zona se asume UTC; la segunda queda justo después de la primera
+    r = confirm(client, admin_headers, [
+        {"id": str(a.id), "scheduled_start": "2025-03-03T10:00:00", "scheduled_end": "2025-03-03T11:00:00"},
+        {"id": str(b.id), "scheduled_start": "2025-03-03T13:00:00+02:00", "scheduled_end": "2025-03-03T12:00:00Z"},
+    ])
+    assert r.status_code == 200, r.get_json()
+    assert [x["ok"] for x in r.get_json()["results"]] == [True, True]
+
+
+def test_bulk_confirm_mixed_batch_overlap_is_409(client, admin_headers):
+    a, b = make_appointments(2)
+    r = confirm(client, admin_headers, [
+        {"id": str(a.id), "scheduled_start": "2025-03-03T10:00:00", "scheduled_end": "2025-03-03T11:00:00"},
+        {"id": str(b.id), "scheduled_start": "2025-03-03T12:30:00+02:00", "scheduled_end": "2025-03-03T11:30:00Z"},
+    ])
+    assert r.status_code == 409
+    assert {c["id"] for c in r.get_json()["conflicts"]} == {str(a.id), str(b.id)}
+
+
+class _Diag:
+    def __init__(self, constraint_name):
+        self.constraint_name = constraint_name
+
+
+class _PgError(Exception):
+    def __init__(self, constraint_name):
+        super().__init__(constraint_name)
+        self.diag = _Diag(constraint_name)
+
+
+@pytest.fixture
+def failing_commit(db, monkeypatch):
+    """El commit falla con un IntegrityError de la constraint indicada (como psycopg2)."""
+    def install(constraint_name):
+        def commit():
+            raise IntegrityError("UPDATE appointments ...", {}, _PgError(constraint_name))
+        monkeypatch.setattr(db.session, "commit", commit)
+    return install
+
+
+def test_overlap_race_on_commit_is_409(client, admin_headers, failing_commit):
+    a, b = make_appointments(2)
+    failing_commit("appointments_no_overlap")
+
+    single = client.post(f"/api/appointments/{a.id}/confirm", headers=admin_headers, json={
+        "scheduled_start": "2025-03-03T10:00:00Z", "scheduled_end": "2025-03-03T11:00:00Z",
+    })
+    assert single.status_code == 409
+    bulk = confirm(client, admin_headers, [
+        {"id": str(b.id), "scheduled_start": "2025-03-03T12:00:00Z", "scheduled_end": "2025-03-03T13:00:00Z"},
+    ])
+    assert bulk.status_code == 409
+
+
+@pytest.mark.parametrize("constraint", ["appointments_user_id_fkey", None])
+def test_other_integrity_errors_are_not_schedule_conflicts(client, admin_headers, failing_commit, constraint):
+    a, b = make_appointments(2)
+    failing_commit(constraint)
+
+    with pytest.raises(IntegrityError):
+        client.post(f"/api/appointments/{a.id}/confirm", headers=admin_headers, json={
+            "scheduled_start": "2025-03-03T10:00:00Z", "scheduled_end": "2025-03-03T11:00:00Z",
+        })
+    with pytest.raises(IntegrityError):
+        confirm(client, admin_headers, [
+            {"id": str(b.id), "scheduled_start": "2025-03-03T12:00:00Z", "scheduled_end": "2025-03-03T13:00:00Z"},
+        ])
@@ -0,0 +1,25 @@
+import pytest
+
+from conftest import make_appointments
+
+
+def test_default_page_is_capped_and_signals_next_cursor(db, client, admin_headers):
+    make_appointments(120)
+
+    first = client.get("/api/appointments/", headers=admin_headers)
+    assert first.status_code == 200
+    assert len(first.get_json()) == 100
+    cursor = first.headers["X-Next-Cursor"]
+
+    rest = client.get(f"/api/appointments/?cursor={cursor}", headers=admin_headers)
+    assert len(rest.get_json()) == 20
+    assert "X-Next-Cursor" not in rest.headers
+
+    ids = {a["id"] for a in first.get_json()} | {a["id"] for a in rest.get_json()}
+    assert len(ids) == 120
+
+
+@pytest.mark.parametrize("limit", ["0", "501", "-3", "abc"])
+def test_out_of_range_limit_is_rejected(db, client, admin_headers, limit):
+    resp = client.get(f"/api/appointments/?limit={limit}", headers=admin_headers)
+    assert resp.status_code == 400
@@ -0,0 +1,45 @@
+"""
+Regresión N+1: el listado de citas tiene que costar la misma cantidad
+de sentencias SQL sin importar cuántas filas (y cuántos pacientes
+distintos) devuelve.
+"""
+import pytest
+from sqlalchemy import event
+
+from conftest import make_appointments
+
+
+def count_statements(db, client, url, headers):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    # sesión limpia: nada cacheado en el identity map
+    db.session.expunge_all()
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        resp = client.get(url, headers=headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return resp, statements
+
+
+@pytest.mark.parametrize("rows", [10, 50, 200])
+def test_list_statement_count_does_not_grow_with_rows(db, client, admin_headers, rows):
+    # un paciente por cita: el peor caso para cargar usuarios de a uno
+    make_appointments(rows, users=rows)
+
+    resp, statements = count_statements(
+        db, client, f"/api/appointments/?limit={rows}", admin_headers
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert len(body) == rows
+    assert all(a["user"]["full_name"] for a in body)
+
+    baseline_resp, baseline = count_statements(
+        db, client, "/api/appointments/?limit=1", admin_headers
+    )
+    assert baseline_resp.status_code == 200
+    assert len(statements) == len(baseline), statements
@@ -0,0 +1,122 @@
+"""
+Paridad del matcher por niveles (exact / index / tfidf) con el matcher
+original, que reajustaba el TfidfVectorizer con cada mensaje y elegía
+sims.argsort()[0][-1].
+"""
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.services.chatbot_service import ChatbotService
+
+# las stopwords del original no coinciden con su tokenizer ("por favor")
+pytestmark = pytest.mark.filterwarnings("ignore::UserWarning")
+
+
+def _dataset():
+    return ChatbotService._build_dataset(ChatbotService._load_data())
+
+
+def original_best_match(message, threshold=0.25):
+    """Scorer original (antes del modelo precalculado), tal cual."""
+    msg = ChatbotService.normalizar(message)
+    if not msg:
+        return ("Decime tu consulta para poder ayudarte 🙂", 1.0, "empty")
+
+    patrones_norm, respuestas, tags = _dataset()
+    try:
+        vectorizer = TfidfVectorizer(
+            ngram_range=(1, 2),
+            stop_words=sorted(ChatbotService.STOPWORDS_ES)
+        )
+        tfidf = vectorizer.fit_transform(patrones_norm + [msg])
+        sims = cosine_similarity(tfidf[-1], tfidf[:-1])
+
+        idx = sims.argsort()[0][-1]
+        score = float(sims[0][idx])
+
+        if score < threshold:
+            return (ChatbotService.FALLBACK, score, None)
+
+        return (respuestas[idx], score, tags[idx])
+
+    except ValueError:
+        return (ChatbotService.FALLBACK, 0.0, None)
+
+
+def corpus():
+    """Patrones, variantes con saludo/cierre y palabras sueltas del vocabulario."""
+    patrones_norm, _, _ = _dataset()
+    palabras = sorted({w for p in patrones_norm for w in p.split() if len(w) > 2})
+    mensajes = (
+        list(patrones_norm)
+        + ["hola " + p for p in patrones_norm]
+        + [p + " gracias" for p in patrones_norm]
+        + palabras
+        + ["hola " + w for w in palabras]
+        + ["", "zzz qqq", "HOLA!!", "¿Dónde están?"]
+    )
+    return list(dict.fromkeys(mensajes))
+
+
+def test_scorer_same_replies_as_original():
+    # solo el coseno (sin el nivel exacto): el modelo se ajusta una vez y
+    # el mensaje ya no entra en el IDF, pero el ganador debe ser el mismo
+    model = ChatbotService._get_model()._replace(exactos={})
+    distintos = []
+    for msg in corpus():
+        respuesta, _, tag, _ = ChatbotService._best_match_many(
+            [ChatbotService.normalizar(msg)], model=model
+        )[0]
+        esperado, _, tag_esperado = original_best_match(msg)
+        if respuesta != esperado:
+            distintos.append((msg, tag, tag_esperado))
+    assert distintos == []
+
+
+def test_same_replies_as_original_scorer():
+    # los tres niveles juntos
+    distintos = []
+    for msg in corpus():
+        respuesta, _, tag = ChatbotService._best_match(msg)
+        esperado, _, tag_esperado = original_best_match(msg)
+        if respuesta != esperado:
+            distintos.append((msg, tag, tag_esperado))
+    assert distintos == []
+
+
+@pytest.mark.parametrize("msg, tag", [
+    # empatan con el patrón "hola" (saludo, fila 0); el original
+    # respondía la intención específica
+    ("hola horario", "horario"),
+    ("hola cuanto cuesta", "precio"),
+    ("hola ubicacion", "ubicacion"),
+    ("hola whatsapp", "contacto"),
+])
+def test_tied_messages_resolve_like_original(msg, tag):
+    _, _, got, tier = ChatbotService._best_match_many([ChatbotService.normalizar(msg)])[0]
+    assert tier == "tfidf"
+    assert got == tag == original_best_match(msg)[2]
+
+
+def test_tiers():
+    patrones_norm, _, _ = _dataset()
+    patron = next(p for p in patrones_norm if ChatbotService._tokens(p))
+
+    exact, unknown, scored = ChatbotService._best_match_many(
+        [patron, "zzz qqq", "hola horario"]
+    )
+    assert exact[3] == "exact"
+    assert exact[2] == original_best_match(patron)[2]
+    assert unknown[3] == "index" and unknown[2] is None
+    assert scored[3] == "tfidf"
+
+
+def test_exact_tier_applies_threshold():
+    # "donde estan" es todo stopwords: el original no lo reconocía
+    respuesta, score, tag, tier = ChatbotService._best_match_many(["donde estan"])[0]
+    assert tier == "exact"
+    assert (respuesta, tag) == (ChatbotService.FALLBACK, None)
@@ -0,0 +1,54 @@
+import pytest
+from flask import Flask
+
+pytest.importorskip("sklearn")
+
+from app.routes.chatbot_routes import bp
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(bp, url_prefix="/chatbot")
+    return app.test_client()
+
+
+def test_batch_reports_invalid_items_without_failing(client):
+    r = client.post("/chatbot/messages", json=[
+        {"message": "hola horario"},
+        {"message": 5},
+        {"message": "hola", "context": ["x"]},
+        {"message": "si", "context": "pregunta_agendar"},
+    ])
+    assert r.status_code == 200
+    ok, bad_message, bad_context, ctx = r.get_json()
+
+    assert ok["ok"] is True and ok["tag"] == "horario"
+    assert bad_message == {"message": 5, "ok": False, "error": "invalid_message"}
+    assert bad_context["ok"] is False and bad_context["error"] == "invalid_context"
+    assert ctx["ok"] is True and ctx["tier"] == "context"
+
+
+def test_single_message_rejects_non_string(client):
+    r = client.post("/chatbot/message", json={"message": 5})
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize("contenido", [None, b"{no es json"])
+def test_compile_without_readable_intents_fails_cleanly(tmp_path, monkeypatch, contenido):
+    from app.services.chatbot_service import ChatbotService
+
+    intents = tmp_path / "intents.json"
+    if contenido is not None:
+        intents.write_bytes(contenido)
+    monkeypatch.setattr(ChatbotService, "_intents_path", intents)
+
+    app = Flask(__name__)
+    app.register_blueprint(bp, url_prefix="/chatbot")
+    result = app.test_cli_runner().invoke(args=["chatbot", "compile", "--output", str(tmp_path / "out.bin")])
+
+    assert result.exit_code == 1
+    assert result.output.startswith("Error: ")
+    assert str(intents) in result.output
+    assert "Traceback" not in result.output
+    assert not (tmp_path / "out.bin").exists()
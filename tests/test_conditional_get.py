@@ -0,0 +1,48 @@
+"""
+Polling con ETag: sin cambios en las tablas, el segundo GET con
+If-None-Match responde 304. En Postgres los contadores de
+change_versions los suben triggers; acá se suben a mano.
+"""
+import pytest
+
+from app.models import ChangeVersion
+from conftest import make_appointments
+
+
+@pytest.fixture
+def versions(db):
+    for resource in ("appointments", "planner_items", "users"):
+        db.session.add(ChangeVersion(resource=resource, version=1))
+    db.session.commit()
+
+
+def bump(db, resource):
+    db.session.get(ChangeVersion, resource).version += 1
+    db.session.commit()
+
+
+def test_appointments_poll_gets_304(db, client, admin_headers, versions):
+    make_appointments(3)
+
+    first = client.get("/api/appointments/", headers=admin_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert "private" in first.headers["Cache-Control"]
+
+    second = client.get("/api/appointments/", headers={**admin_headers, "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b""
+
+    bump(db, "appointments")
+    third = client.get("/api/appointments/", headers={**admin_headers, "If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["ETag"] != etag
+
+
+def test_planner_poll_gets_304(db, client, versions):
+    url = "/api/planner/?from=2025-01-01T00:00:00Z&to=2025-02-01T00:00:00Z"
+    first = client.get(url)
+    assert first.status_code == 200
+
+    second = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
@@ -0,0 +1,72 @@
+import jwt
+import pytest
+
+from app.services import change_feed
+from app.services.jwt_service import JWT_ALGORITHM, JWT_SECRET, create_stream_token
+
+
+@pytest.fixture(autouse=True)
+def local_feed(monkeypatch):
+    # sin Postgres: pub/sub en memoria, sin hilo de LISTEN
+    monkeypatch.setattr(change_feed, "BACKEND", "local")
+
+
+def open_stream(client, **kwargs):
+    resp = client.get("/api/events/stream", buffered=False, **kwargs)
+    resp.close()  # el stream no termina solo: no leer el cuerpo
+    return resp.status_code
+
+
+def test_stream_opens_with_short_lived_stream_token(client, admin_headers):
+    r = client.post("/api/events/stream-token", headers=admin_headers)
+    assert r.status_code == 200
+    assert r.headers["Cache-Control"] == "no-store"
+    token = r.get_json()["stream_token"]
+
+    assert open_stream(client, query_string={"stream_token": token}) == 200
+
+
+def test_access_token_is_not_accepted_in_the_url(client, admin_headers):
+    access_token = admin_headers["Authorization"].split(" ", 1)[1]
+    assert open_stream(client, query_string={"stream_token": access_token}) == 401
+    assert open_stream(client, query_string={"access_token": access_token}) == 401
+
+
+def test_stream_token_is_not_an_api_token(client):
+    token = create_stream_token("u1", "admin@example.com", "admin")
+    r = client.get("/api/events/stats", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 401
+
+
+def test_expired_stream_token_is_rejected(client):
+    token = jwt.encode(
+        {"sub": "u1", "role": "admin", "scope": "sse", "exp": 1},
+        JWT_SECRET, algorithm=JWT_ALGORITHM,
+    )
+    assert open_stream(client, query_string={"stream_token": token}) == 401
+
+
+def test_stream_token_requires_login(client):
+    assert client.post("/api/events/stream-token").status_code == 401
+
+
+def test_stream_is_refused_when_disabled(client, monkeypatch):
+    # perfil sync de gunicorn
+    monkeypatch.setattr(change_feed, "MAX_SUBSCRIBERS", 0)
+    token = create_stream_token("u1", "admin@example.com", "admin")
+    assert open_stream(client, query_string={"stream_token": token}) == 501
+
+
+def test_streams_per_worker_are_capped(client, monkeypatch):
+    monkeypatch.setattr(change_feed, "MAX_SUBSCRIBERS", 1)
+    qs = {"stream_token": create_stream_token("u1", "admin@example.com", "admin")}
+
+    first = client.get("/api/events/stream", query_string=qs, buffered=False)
+    assert first.status_code == 200
+    second = client.get("/api/events/stream", query_string=qs, buffered=False)
+    assert second.status_code == 503
+    assert second.headers["Retry-After"]
+
+    first.close()  # libera el lugar
+    assert change_feed.ChangeFeed.stats()["subscribers"] == 0
+    assert open_stream(client, query_string=qs) == 200
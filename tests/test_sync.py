@@ -0,0 +1,27 @@
+import uuid
+
+import pytest
+
+from app.models import Appointment, User
+
+
+def test_new_rows_get_updated_at_from_the_database(db, client, admin_headers):
+    user = User(full_name="Paciente", email="p@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    appt = Appointment(id=uuid.uuid4(), user_id=user.id, description="Dolor")
+    db.session.add(appt)
+    db.session.commit()
+
+    # el INSERT no manda updated_at: lo completa el default de la base
+    assert appt.updated_at is not None
+
+    r = client.get("/api/sync", headers=admin_headers)
+    assert r.status_code == 200
+    assert [a["id"] for a in r.get_json()["appointments"]] == [str(appt.id)]
+
+
+@pytest.mark.parametrize("limit", ["0", "2001", "-1", "abc"])
+def test_out_of_range_limit_is_400(client, admin_headers, limit):
+    r = client.get("/api/sync", query_string={"limit": limit}, headers=admin_headers)
+    assert r.status_code == 400
@@ -0,0 +1,11 @@
+# wsgi.py
+# Punto de entrada de producción: gunicorn -c gunicorn.conf.py wsgi:app
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent
+load_dotenv(dotenv_path=BASE_DIR / ".env", override=False, encoding="utf-8")
+
+from app import create_app
+
+app = create_app()